@@ -1 +1,35 @@
 # Core package initialization
+import importlib
+
+# Collector and engine classes, imported on first attribute access so that
+# loading one module does not pay for every other module's dependencies
+COLLECTORS = {
+    'DomainTracer': 'core.passive.domain_tracer',
+    'LeakDetective': 'core.passive.leak_detective',
+    'PeopleProfiler': 'core.passive.people_profiler',
+    'BucketScanner': 'core.active.bucket_scanner',
+    'EndpointValidator': 'core.active.endpoint_validator',
+    'GraphEngine': 'core.intelligence.graph_engine',
+    'GraphAnalytics': 'core.intelligence.graph_analytics',
+    'GraphIngestor': 'core.intelligence.graph_adapters',
+    'ReportBuilder': 'core.intelligence.report_builder'
+}
+
+__all__ = list(COLLECTORS)
+
+
+def load_collector(name):
+    """Import and return a collector class by name"""
+    if name not in COLLECTORS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    cls = getattr(importlib.import_module(COLLECTORS[name]), name)
+    globals()[name] = cls
+    return cls
+
+
+def __getattr__(name):
+    return load_collector(name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(COLLECTORS))
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+
+class BucketProbeCache:
+    """Persistent cache of BucketProbe outcomes with separate TTLs.
+
+    Names that do not exist rarely start existing, so negative results
+    are kept much longer than positive ones, whose permissions change.
+    Probe errors are never cached.
+    """
+
+    def __init__(self, path='bucket_probe_cache.sqlite', positive_ttl=DAY, negative_ttl=30 * DAY):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bucket_probes (
+                endpoint TEXT,
+                bucket TEXT,
+                status TEXT,
+                region TEXT,
+                listable INTEGER,
+                http_status INTEGER,
+                url TEXT,
+                checked_at REAL,
+                PRIMARY KEY (endpoint, bucket)
+            )
+        """)
+        self.conn.commit()
+
+    def _ttl(self, status):
+        return self.negative_ttl if status == 'nonexistent' else self.positive_ttl
+
+    def get_many(self, endpoint, bucket_names):
+        """Return {bucket: probe result} for names with a fresh cached outcome"""
+        now = time.time()
+        fresh = {}
+        names = list(bucket_names)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(names), 500):
+                batch = names[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT bucket, status, region, listable, http_status, url, checked_at "
+                    f"FROM bucket_probes WHERE endpoint = ? AND bucket IN ({','.join('?' * len(batch))})",
+                    [endpoint] + batch
+                ).fetchall()
+                for bucket, status, region, listable, http_status, url, checked_at in rows:
+                    if now - checked_at < self._ttl(status):
+                        fresh[bucket] = {
+                            'bucket': bucket,
+                            'exists': status != 'nonexistent',
+                            'status': status,
+                            'region': region,
+                            'listable': bool(listable),
+                            'http_status': http_status,
+                            'url': url,
+                            'cached': True
+                        }
+        return fresh
+
+    def put_many(self, endpoint, results):
+        """Store conclusive probe results"""
+        now = time.time()
+        rows = [
+            (endpoint, r['bucket'], r['status'], r.get('region'), int(bool(r.get('listable'))),
+             r.get('http_status'), r.get('url'), now)
+            for r in results if r.get('status') in ('nonexistent', 'private', 'public')
+        ]
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO bucket_probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Delete entries past their TTL; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM bucket_probes WHERE "
+                "(status = 'nonexistent' AND checked_at < ?) OR (status != 'nonexistent' AND checked_at < ?)",
+                (now - self.negative_ttl, now - self.positive_ttl)
+            )
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
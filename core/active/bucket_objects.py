@@ -0,0 +1,90 @@
+import os
+import re
+from collections import Counter
+
+SENSITIVE_OBJECT_PATTERNS = {
+    'env_file': r'(^|/)\.env(\.|$)',
+    'private_key': r'(^|/)id_(rsa|dsa|ecdsa|ed25519)$|\.(pem|key|p12|pfx|ppk)$',
+    'database_dump': r'\.(sql|dump|bak|sqlite3?|db)(\.gz|\.zip|\.bz2)?$',
+    'credentials': r'(password|passwd|secret|credential|token)',
+    'terraform_state': r'\.tfstate(\.backup)?$',
+    'config_file': r'(^|/)(config|settings|secrets?)\.(json|ya?ml|ini|xml|php|py)$',
+    'git_metadata': r'(^|/)\.git/'
+}
+
+# Exclusive upper bounds (bytes) of the size histogram buckets
+SIZE_BUCKETS = [
+    (1, '0'),
+    (1024, '<1KB'),
+    (10 * 1024, '<10KB'),
+    (100 * 1024, '<100KB'),
+    (1024 ** 2, '<1MB'),
+    (10 * 1024 ** 2, '<10MB'),
+    (100 * 1024 ** 2, '<100MB'),
+    (1024 ** 3, '<1GB')
+]
+
+
+class ObjectSummary:
+    """Running statistics over a bucket listing, in constant memory"""
+
+    def __init__(self, patterns=None, max_extensions=500, max_matches=100):
+        self.patterns = {name: re.compile(pattern, re.IGNORECASE)
+                         for name, pattern in (patterns or SENSITIVE_OBJECT_PATTERNS).items()}
+        self.max_extensions = max_extensions
+        self.max_matches = max_matches
+        self.total_objects = 0
+        self.total_size = 0
+        self.extensions = Counter()
+        self.size_histogram = Counter()
+        self.newest = None
+        self.oldest = None
+        self.sensitive_matches = []
+        self.sensitive_counts = Counter()
+        self.truncated = False
+
+    def add(self, obj):
+        """Fold one {'key', 'size', 'last_modified'} object into the summary"""
+        key = obj['key']
+        size = obj.get('size') or 0
+        self.total_objects += 1
+        self.total_size += size
+
+        extension = os.path.splitext(key)[1].lower() or '<none>'
+        if extension in self.extensions or len(self.extensions) < self.max_extensions:
+            self.extensions[extension] += 1
+        else:
+            self.extensions['<other>'] += 1
+
+        for limit, label in SIZE_BUCKETS:
+            if size < limit:
+                break
+        else:
+            label = '>=1GB'
+        self.size_histogram[label] += 1
+
+        modified = obj.get('last_modified')
+        if modified:
+            if self.newest is None or modified > self.newest['last_modified']:
+                self.newest = {'key': key, 'last_modified': modified}
+            if self.oldest is None or modified < self.oldest['last_modified']:
+                self.oldest = {'key': key, 'last_modified': modified}
+
+        for name, pattern in self.patterns.items():
+            if pattern.search(key):
+                self.sensitive_counts[name] += 1
+                if len(self.sensitive_matches) < self.max_matches:
+                    self.sensitive_matches.append({'key': key, 'pattern': name, 'size': size})
+
+    def to_dict(self):
+        return {
+            'total_objects': self.total_objects,
+            'total_size': self.total_size,
+            'extensions': dict(self.extensions.most_common()),
+            'size_histogram': dict(self.size_histogram),
+            'newest': self.newest,
+            'oldest': self.oldest,
+            'sensitive_counts': dict(self.sensitive_counts),
+            'sensitive_matches': self.sensitive_matches,
+            'truncated': self.truncated
+        }
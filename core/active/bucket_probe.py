@@ -0,0 +1,104 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_ENDPOINT = 'https://s3.amazonaws.com'
+
+
+class BucketProbe:
+    """Anonymous HTTP probe for S3 bucket existence, region and public listing.
+
+    One HEAD per bucket answers most questions without AWS credentials:
+    404 means the bucket does not exist, 403 that it exists but is
+    private, 200 that anonymous listing is allowed. Buckets in another
+    region answer with a redirect carrying x-amz-bucket-region, which
+    costs one more HEAD against the regional endpoint. Pass endpoint_url
+    (e.g. a local moto server) to probe an S3 stand-in with path-style URLs.
+    """
+
+    def __init__(self, endpoint_url=None, concurrency=100, timeout=10, cache=None):
+        self.endpoint_url = (endpoint_url or DEFAULT_ENDPOINT).rstrip('/')
+        # Optional BucketProbeCache consulted before any request is sent
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {'User-Agent': 'TargetTrace/1.0'}
+
+    def probe(self, bucket_names, force_refresh=False):
+        """Probe buckets and return one result dict per name, in input order
+
+        Blocking entry point. Coroutines should await probe_many instead;
+        if one calls probe anyway, the probe runs its own event loop on a
+        helper thread, since asyncio.run cannot nest in a running loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.probe_many(bucket_names, force_refresh))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.probe_many(bucket_names, force_refresh)).result()
+
+    async def probe_many(self, bucket_names, force_refresh=False):
+        """Async entry point: probe buckets on the caller's event loop"""
+        import aiohttp
+
+        bucket_names = list(bucket_names)
+        known = {}
+        if self.cache and not force_refresh:
+            known = self.cache.get_many(self.endpoint_url, bucket_names)
+        pending = [name for name in dict.fromkeys(bucket_names) if name not in known]
+
+        if pending:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                             headers=self.headers) as session:
+                probed = await asyncio.gather(*(self._probe_one(session, name) for name in pending))
+            if self.cache:
+                self.cache.put_many(self.endpoint_url, probed)
+            known.update((result['bucket'], result) for result in probed)
+
+        return [known[name] for name in bucket_names]
+
+    def bucket_url(self, bucket_name, region=None):
+        """Virtual-hosted URL on AWS, path-style for dotted names and custom endpoints"""
+        if self.endpoint_url != DEFAULT_ENDPOINT:
+            return f"{self.endpoint_url}/{bucket_name}"
+        host = f"s3.{region}.amazonaws.com" if region else 's3.amazonaws.com'
+        if '.' in bucket_name:
+            return f"https://{host}/{bucket_name}"
+        return f"https://{bucket_name}.{host}"
+
+    async def _probe_one(self, session, bucket_name):
+        result = {
+            'bucket': bucket_name,
+            'exists': False,
+            'status': 'error',
+            'region': None,
+            'listable': False,
+            'http_status': None,
+            'url': self.bucket_url(bucket_name)
+        }
+        try:
+            status, region = await self._head(session, result['url'])
+            if status in (301, 307, 400) and region:
+                # Wrong regional endpoint: retry once where the bucket lives
+                result['url'] = self.bucket_url(bucket_name, region)
+                status, region = await self._head(session, result['url'])
+
+            result['http_status'] = status
+            result['region'] = region
+            if status == 404:
+                result['status'] = 'nonexistent'
+            elif status == 200:
+                result.update(exists=True, status='public', listable=True)
+            elif status == 403:
+                result.update(exists=True, status='private')
+            elif region:
+                result.update(exists=True, status='private')
+        except Exception as e:
+            result['error'] = str(e)
+        return result
+
+    async def _head(self, session, url):
+        async with session.head(url, allow_redirects=False) as response:
+            return response.status, response.headers.get('x-amz-bucket-region')
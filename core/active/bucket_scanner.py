@@ -1,13 +1,19 @@
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
 import requests
+import requests.adapters
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import re
+from core.active.bucket_objects import ObjectSummary
+from core.active.bucket_probe import BucketProbe
+from core.sinks import JSONLSink
 
 class BucketScanner:
-    def __init__(self):
+    def __init__(self, max_workers=16, max_pool_connections=50, object_sink_dir=None,
+                 max_objects=None, object_sample_size=1000, fast_path=True, endpoint_url=None,
+                 probe_cache=None):
         self.results = {
             'buckets': [],
             'errors': []
@@ -15,49 +21,112 @@ class BucketScanner:
         self.public_permissions = [
             'READ', 'WRITE', 'READ_ACP', 'WRITE_ACP', 'FULL_CONTROL'
         ]
+        self.max_workers = max_workers
+        self.max_pool_connections = max_pool_connections
+        # Public bucket listings stream to <object_sink_dir>/<bucket>_objects.jsonl
+        self.object_sink_dir = object_sink_dir
+        self.max_objects = max_objects
+        self.object_sample_size = object_sample_size
+        # Anonymous HTTP probing filters out nonexistent buckets before boto3.
+        # On by default: such buckets are only reported in results['errors']
+        # and never reach boto3; fast_path=False checks every name with boto3.
+        self.fast_path = fast_path
+        # endpoint_url points both boto3 and the probe at an S3 stand-in such as moto server
+        self.endpoint_url = endpoint_url
+        self.probe = BucketProbe(endpoint_url=endpoint_url, concurrency=max_pool_connections,
+                                 cache=probe_cache)
+
+        # One S3 client and HTTP session shared by every scan thread
+        self._s3 = None
+        self._client_lock = threading.Lock()
+        self._results_lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_pool_connections,
+                                                pool_maxsize=max_pool_connections)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        # Per-bucket sub-checks run here, separate from the bucket-level pool
+        self._check_pool = ThreadPoolExecutor(max_workers=max_workers * 3)
+
+    def _client(self):
+        """Return the shared S3 client, creating it on first use"""
+        if self._s3 is None:
+            with self._client_lock:
+                if self._s3 is None:
+                    # boto3 is slow to import, so load it only when a bucket is scanned
+                    import boto3
+                    from botocore.config import Config
+
+                    config = Config(
+                        max_pool_connections=self.max_pool_connections,
+                        connect_timeout=5,
+                        read_timeout=10,
+                        retries={'max_attempts': 3, 'mode': 'adaptive'}
+                    )
+                    # Clients are thread-safe, sessions are not: build it from a private session
+                    self._s3 = boto3.session.Session().client('s3', config=config,
+                                                              endpoint_url=self.endpoint_url)
+        return self._s3
+
+    def close(self):
+        """Shut down the sub-check pool and close pooled HTTP connections"""
+        self._check_pool.shutdown(wait=True)
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _add_error(self, message):
+        with self._results_lock:
+            self.results['errors'].append(message)
+
+    def _add_bucket(self, bucket_result):
+        with self._results_lock:
+            self.results['buckets'].append(bucket_result)
+
+    def check_bucket_permissions(self, bucket_name, probe_result=None):
+        """Check permissions for a specific S3 bucket
+
+        probe_result, from BucketProbe, replaces the separate anonymous
+        public-access request and supplies the bucket region.
+        """
+        from botocore.exceptions import ClientError, NoCredentialsError
 
-    def check_bucket_permissions(self, bucket_name):
-        """Check permissions for a specific S3 bucket"""
         try:
-            s3 = boto3.client('s3')
+            s3 = self._client()
             
             # Check bucket existence
             try:
                 s3.head_bucket(Bucket=bucket_name)
             except ClientError as e:
                 if e.response['Error']['Code'] == '404':
-                    self.results['errors'].append(f"Bucket {bucket_name} does not exist")
+                    self._add_error(f"Bucket {bucket_name} does not exist")
                     return
                 elif e.response['Error']['Code'] == '403':
-                    self.results['errors'].append(f"Access denied to bucket {bucket_name}")
+                    self._add_error(f"Access denied to bucket {bucket_name}")
                     return
                 else:
                     raise
 
+            # ACL, policy and public-access checks are independent, so run them together
+            acl_check = self._check_pool.submit(s3.get_bucket_acl, Bucket=bucket_name)
+            policy_check = self._check_pool.submit(self._check_policy, s3, bucket_name)
+            if probe_result is None:
+                public_check = self._check_pool.submit(self._check_public, bucket_name)
+
             # Check bucket ACL
-            acl = s3.get_bucket_acl(Bucket=bucket_name)
+            acl = acl_check.result()
             public_grants = [
                 grant for grant in acl['Grants']
                 if 'URI' in grant['Grantee'] and 
                 grant['Grantee']['URI'] == 'http://acs.amazonaws.com/groups/global/AllUsers'
             ]
 
-            # Check bucket policy
-            try:
-                policy = s3.get_bucket_policy(Bucket=bucket_name)
-                policy_doc = json.loads(policy['Policy'])
-                self._analyze_policy(policy_doc, bucket_name)
-            except ClientError as e:
-                if e.response['Error']['Code'] != 'NoSuchBucketPolicy':
-                    self.results['errors'].append(f"Error checking bucket policy: {str(e)}")
-
-            # Check if bucket is publicly accessible
-            try:
-                url = f"http://{bucket_name}.s3.amazonaws.com"
-                r = requests.head(url, timeout=5)
-                is_public = r.status_code == 200
-            except:
-                is_public = False
+            policy_check.result()
+            is_public = probe_result['listable'] if probe_result else public_check.result()
 
             bucket_result = {
                 'name': bucket_name,
@@ -66,25 +135,102 @@ class BucketScanner:
                 'public_permissions': [g['Permission'] for g in public_grants],
                 'objects': []
             }
+            if probe_result and probe_result.get('region'):
+                bucket_result['region'] = probe_result['region']
 
-            # List objects if bucket is public
+            # Enumerate objects if bucket is public
             if is_public:
+                sink = None
+                if self.object_sink_dir:
+                    os.makedirs(self.object_sink_dir, exist_ok=True)
+                    sink = os.path.join(self.object_sink_dir, f"{bucket_name}_objects.jsonl")
                 try:
-                    objects = s3.list_objects_v2(Bucket=bucket_name)
-                    if 'Contents' in objects:
-                        bucket_result['objects'] = [
-                            {'key': obj['Key'], 'size': obj['Size']} 
-                            for obj in objects['Contents']
-                        ]
+                    summary = self.enumerate_bucket_objects(bucket_name, sink=sink,
+                                                            max_keys=self.max_objects)
+                    bucket_result['objects'] = summary.pop('sample')
+                    bucket_result['object_summary'] = summary
                 except ClientError as e:
-                    self.results['errors'].append(f"Error listing objects: {str(e)}")
+                    self._add_error(f"Error listing objects: {str(e)}")
 
-            self.results['buckets'].append(bucket_result)
+            self._add_bucket(bucket_result)
 
         except NoCredentialsError:
-            self.results['errors'].append("AWS credentials not configured")
+            self._add_error("AWS credentials not configured")
         except Exception as e:
-            self.results['errors'].append(f"Error scanning bucket {bucket_name}: {str(e)}")
+            self._add_error(f"Error scanning bucket {bucket_name}: {str(e)}")
+
+    def iter_bucket_objects(self, bucket_name, prefix='', max_keys=None, max_bytes=None):
+        """Yield every object in a bucket, following list_objects_v2 pagination
+
+        Stops early after max_keys objects or once max_bytes of object
+        data has been listed.
+        """
+        paginator = self._client().get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix,
+                                   PaginationConfig={'PageSize': 1000})
+        listed = 0
+        listed_bytes = 0
+        for page in pages:
+            for obj in page.get('Contents', []):
+                yield {
+                    'key': obj['Key'],
+                    'size': obj['Size'],
+                    'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else None,
+                    'storage_class': obj.get('StorageClass')
+                }
+                listed += 1
+                listed_bytes += obj['Size']
+                if (max_keys and listed >= max_keys) or (max_bytes and listed_bytes >= max_bytes):
+                    return
+
+    def enumerate_bucket_objects(self, bucket_name, sink=None, prefix='', max_keys=None,
+                                 max_bytes=None, sample_size=None):
+        """Stream a bucket listing into summary statistics and an optional JSONL sink
+
+        sink may be a file path or a JSONLSink. Only the first sample_size
+        objects are kept in memory.
+        """
+        sample_size = self.object_sample_size if sample_size is None else sample_size
+        summary = ObjectSummary()
+        sample = []
+        writer = JSONLSink(sink, mode='w') if isinstance(sink, str) else sink
+        try:
+            for obj in self.iter_bucket_objects(bucket_name, prefix, max_keys, max_bytes):
+                summary.add(obj)
+                if len(sample) < sample_size:
+                    sample.append({'key': obj['key'], 'size': obj['size']})
+                if writer:
+                    writer.write(obj)
+        finally:
+            if writer and writer is not sink:
+                writer.close()
+
+        summary.truncated = bool((max_keys and summary.total_objects >= max_keys)
+                                 or (max_bytes and summary.total_size >= max_bytes))
+        result = summary.to_dict()
+        result['sample'] = sample
+        return result
+
+    def _check_policy(self, s3, bucket_name):
+        """Check bucket policy for public statements"""
+        from botocore.exceptions import ClientError
+
+        try:
+            policy = s3.get_bucket_policy(Bucket=bucket_name)
+            policy_doc = json.loads(policy['Policy'])
+            self._analyze_policy(policy_doc, bucket_name)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchBucketPolicy':
+                self._add_error(f"Error checking bucket policy: {str(e)}")
+
+    def _check_public(self, bucket_name):
+        """Check if bucket is publicly accessible"""
+        try:
+            # Same URL the probe uses, so endpoint_url stand-ins are honoured
+            r = self._session.head(self.probe.bucket_url(bucket_name), timeout=5)
+            return r.status_code == 200
+        except:
+            return False
 
     def _analyze_policy(self, policy_doc, bucket_name):
         """Analyze bucket policy for public access"""
@@ -92,19 +238,47 @@ class BucketScanner:
             if statement.get('Effect') == 'Allow':
                 principal = statement.get('Principal', {})
                 if principal == '*' or (isinstance(principal, dict) and 'AWS' in principal and principal['AWS'] == '*'):
-                    self.results['buckets'].append({
+                    self._add_bucket({
                         'name': bucket_name,
                         'policy_public': True,
                         'policy_actions': statement.get('Action', []),
                         'policy_resources': statement.get('Resource', [])
                     })
 
-    def scan_buckets(self, bucket_names):
-        """Scan multiple S3 buckets"""
-        for name in bucket_names:
-            self.check_bucket_permissions(name)
+    def scan_buckets(self, bucket_names, workers=None, force_refresh=False):
+        """Scan multiple S3 buckets concurrently (workers=1 scans one at a time)
+
+        force_refresh ignores cached probe outcomes from probe_cache.
+        """
+        workers = workers or self.max_workers
+        targets = [(name, None) for name in bucket_names]
+        if self.fast_path:
+            targets = self._confirmed_buckets(bucket_names, force_refresh)
+
+        if workers == 1:
+            for name, probe_result in targets:
+                self.check_bucket_permissions(name, probe_result)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Consume the iterator so worker exceptions are not silently dropped
+            list(pool.map(lambda target: self.check_bucket_permissions(*target), targets))
+
+    def _confirmed_buckets(self, bucket_names, force_refresh=False):
+        """Probe anonymously and keep only buckets worth the boto3 analysis"""
+        targets = []
+        for probe_result in self.probe.probe(bucket_names, force_refresh):
+            name = probe_result['bucket']
+            if probe_result['status'] == 'nonexistent':
+                self._add_error(f"Bucket {name} does not exist")
+            elif probe_result['status'] == 'error':
+                # Inconclusive probe: let boto3 decide
+                targets.append((name, None))
+            else:
+                targets.append((name, probe_result))
+        return targets
 
-    def find_buckets_by_domain(self, domain):
+    def find_buckets_by_domain(self, domain, workers=None, force_refresh=False):
         """Find potential S3 buckets based on domain name"""
         common_prefixes = [
             '',
@@ -127,10 +301,12 @@ class BucketScanner:
             for suffix in ['dev', 'prod', 'stage', 'test', 'archive']
         ]
 
+        candidates = []
         for candidate in bucket_candidates:
             candidate = re.sub(r'[^a-z0-9\-]', '', candidate.lower())
-            if len(candidate) > 3:  # Minimum bucket name length
-                self.check_bucket_permissions(candidate)
+            if len(candidate) > 3 and candidate not in candidates:  # Minimum bucket name length
+                candidates.append(candidate)
+        self.scan_buckets(candidates, workers, force_refresh)
 
     def to_json(self):
         """Return results as JSON"""
@@ -1,4 +1,5 @@
 import requests
+import asyncio
 import json
 import os
 from datetime import datetime
@@ -6,20 +7,117 @@ from urllib.parse import urlparse
 import socket
 import ssl
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from core.active.probe_plugins import ProbeEngine
+from core.http_fetch import fetch
+from core.rate_limit import TokenBucket
+
+# (technology, header name or None for the body, pattern)
+TECH_SIGNATURES = [
+    ('nginx', 'Server', re.compile(r'nginx', re.I)),
+    ('apache', 'Server', re.compile(r'apache', re.I)),
+    ('iis', 'Server', re.compile(r'microsoft-iis', re.I)),
+    ('cloudflare', 'Server', re.compile(r'cloudflare', re.I)),
+    ('php', 'X-Powered-By', re.compile(r'php', re.I)),
+    ('asp.net', 'X-Powered-By', re.compile(r'asp\.net', re.I)),
+    ('express', 'X-Powered-By', re.compile(r'express', re.I)),
+    ('php', 'Set-Cookie', re.compile(r'PHPSESSID')),
+    ('java', 'Set-Cookie', re.compile(r'JSESSIONID')),
+    ('wordpress', None, re.compile(r'wp-content|wp-includes', re.I)),
+    ('drupal', None, re.compile(r'Drupal\.settings|/sites/default/files', re.I)),
+    ('joomla', None, re.compile(r'/media/jui/|content="Joomla', re.I)),
+    ('react', None, re.compile(r'data-reactroot|__NEXT_DATA__', re.I)),
+    ('angular', None, re.compile(r'ng-version=', re.I)),
+    ('jquery', None, re.compile(r'jquery[.-][\d.]*(?:min\.)?js', re.I))
+]
+
 
 class EndpointValidator:
-    def __init__(self):
+    def __init__(self, pool_size=10, probes=None, max_body_bytes=2 * 1024 * 1024, deadline=30,
+                 max_sessions=32):
         self.results = {
             'endpoints': [],
-            'errors': []
+            'errors': [],
+            'probe_stats': {}
         }
         self.headers = {
             'User-Agent': 'TargetTrace/1.0',
             'Accept': '*/*'
         }
+        # One keep-alive session per origin, reused by every probe against it.
+        # At most max_sessions are kept; idle ones are closed LRU-first so
+        # open sockets do not grow with the number of hosts.
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        # Active probes: names from PROBE_PLUGINS, all registered plugins by default
+        self.probe_engine = ProbeEngine(probes)
+        # Base responses are read at most this far and for this long
+        self.max_body_bytes = max_body_bytes
+        self.deadline = deadline
+
+    def _origin(self, url):
+        parsed = urlparse(url if '://' in url else f"http://{url}")
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _acquire_session(self, url):
+        """Pooled session for the URL's origin, held in use until _release_session"""
+        origin = self._origin(url)
+        with self._sessions_lock:
+            entry = self._sessions.get(origin)
+            if entry is None:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session = requests.Session()
+                session.headers.update(self.headers)
+                session.mount(origin, adapter)
+                # [session, requests in flight]
+                entry = self._sessions[origin] = [session, 0]
+            self._sessions.move_to_end(origin)
+            entry[1] += 1
+            return origin, entry[0]
+
+    def _release_session(self, origin):
+        with self._sessions_lock:
+            entry = self._sessions.get(origin)
+            if entry:
+                entry[1] -= 1
+            excess = len(self._sessions) - self.max_sessions
+            for idle_origin in list(self._sessions):
+                if excess <= 0:
+                    break
+                if not self._sessions[idle_origin][1]:
+                    self._sessions.pop(idle_origin)[0].close()
+                    excess -= 1
+
+    def close_session(self, url):
+        """Close the origin's session if nothing is using it"""
+        origin = self._origin(url)
+        with self._sessions_lock:
+            entry = self._sessions.get(origin)
+            if entry and not entry[1]:
+                self._sessions.pop(origin)[0].close()
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._sessions_lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
 
     def validate_endpoint(self, url):
         """Validate and test a single endpoint"""
+        endpoint_result, error = self._validate(url)
+        if error:
+            self.results['errors'].append(f"Error validating {url}: {error}")
+            return None
+        self.results['endpoints'].append(endpoint_result)
+        return endpoint_result
+
+    def _validate(self, url):
+        """Run the pipeline, returning (result, None) or (None, error message)"""
         try:
             parsed = urlparse(url)
             if not parsed.scheme:
@@ -32,7 +130,9 @@ class EndpointValidator:
                 'ssl': {},
                 'http': {},
                 'security_headers': {},
-                'vulnerabilities': []
+                'technologies': [],
+                'vulnerabilities': [],
+                'probes': {}
             }
 
             # DNS validation
@@ -42,19 +142,24 @@ class EndpointValidator:
             if parsed.scheme == 'https':
                 self._check_ssl(parsed.hostname, endpoint_result)
 
-            # HTTP validation
-            self._check_http(url, endpoint_result)
-
-            # Security headers check
-            self._check_security_headers(url, endpoint_result)
+            origin, session = self._acquire_session(url)
+            try:
+                # Fetch the base response once and share it with every analyser
+                response = self._fetch_base(session, url, endpoint_result)
+                if response is not None:
+                    self._check_http(response, endpoint_result)
+                    self._check_security_headers(response, endpoint_result)
+                    self._check_technologies(response, endpoint_result)
 
-            # Common vulnerability checks
-            self._check_vulnerabilities(url, endpoint_result)
-
-            self.results['endpoints'].append(endpoint_result)
+                # Active probe plugins over the same keep-alive connection
+                self.probe_engine.run(session, url, endpoint_result, base_ok=response is not None)
+            finally:
+                self._release_session(origin)
+            self.results['probe_stats'] = self.probe_engine.summary()
+            return endpoint_result, None
 
         except Exception as e:
-            self.results['errors'].append(f"Error validating {url}: {str(e)}")
+            return None, str(e)
 
     def _check_dns(self, hostname, result):
         """Check DNS records for hostname"""
@@ -75,7 +180,7 @@ class EndpointValidator:
         """Check SSL/TLS configuration"""
         try:
             context = ssl.create_default_context()
-            with socket.create_connection((hostname, 443)) as sock:
+            with socket.create_connection((hostname, 443), timeout=10) as sock:
                 with context.wrap_socket(sock, server_hostname=hostname) as ssock:
                     cert = ssock.getpeercert()
                     result['ssl']['issuer'] = dict(x[0] for x in cert['issuer'])
@@ -86,25 +191,33 @@ class EndpointValidator:
         except Exception as e:
             result['ssl']['error'] = str(e)
 
-    def _check_http(self, url, result):
-        """Check HTTP response and headers"""
+    def _fetch_base(self, session, url, result):
+        """Fetch the endpoint once, following redirects; errors are recorded under result['http']"""
         try:
-            r = requests.get(url, headers=self.headers, timeout=10, allow_redirects=False)
-            result['http']['status'] = r.status_code
-            result['http']['headers'] = dict(r.headers)
-            result['http']['server'] = r.headers.get('Server', '')
-            result['http']['content_type'] = r.headers.get('Content-Type', '')
-            
-            # Check for redirects
-            if 300 <= r.status_code < 400:
-                result['http']['redirect'] = r.headers.get('Location', '')
+            r = fetch(url, session, max_bytes=self.max_body_bytes, deadline=self.deadline,
+                      timeout=10)
+            if r.truncated:
+                result['http']['truncated'] = r.reason
+            return r
         except Exception as e:
             result['http']['error'] = str(e)
+            return None
 
-    def _check_security_headers(self, url, result):
+    def _check_http(self, r, result):
+        """Check the first HTTP response (before any redirect) and its headers"""
+        r = r.history[0] if r.history else r
+        result['http']['status'] = r.status_code
+        result['http']['headers'] = dict(r.headers)
+        result['http']['server'] = r.headers.get('Server', '')
+        result['http']['content_type'] = r.headers.get('Content-Type', '')
+
+        # Check for redirects
+        if 300 <= r.status_code < 400:
+            result['http']['redirect'] = r.headers.get('Location', '')
+
+    def _check_security_headers(self, r, result):
         """Check for important security headers"""
         try:
-            r = requests.get(url, headers=self.headers, timeout=5)
             headers = r.headers
             
             security_headers = {
@@ -120,33 +233,126 @@ class EndpointValidator:
         except:
             pass
 
-    def _check_vulnerabilities(self, url, result):
-        """Check for common vulnerabilities"""
+    def _check_technologies(self, r, result):
+        """Fingerprint server-side and client-side technologies"""
         try:
-            # Check for directory traversal
-            test_url = f"{url}/../../../../etc/passwd"
-            r = requests.get(test_url, headers=self.headers, timeout=5)
-            if "root:" in r.text:
-                result['vulnerabilities'].append('directory_traversal')
-
-            # Check for basic SQLi
-            test_url = f"{url}?id=1'"
-            r = requests.get(test_url, headers=self.headers, timeout=5)
-            if "SQL syntax" in r.text or "mysql" in r.text.lower():
-                result['vulnerabilities'].append('possible_sqli')
-
-            # Check for XSS
-            test_url = f"{url}?q=<script>alert(1)</script>"
-            r = requests.get(test_url, headers=self.headers, timeout=5)
-            if "<script>alert(1)</script>" in r.text:
-                result['vulnerabilities'].append('possible_xss')
+            body = r.text
+            found = []
+            for tech, header, pattern in TECH_SIGNATURES:
+                source = r.headers.get(header, '') if header else body
+                if tech not in found and pattern.search(source):
+                    found.append(tech)
+            result['technologies'] = found
         except:
             pass
 
-    def validate_multiple(self, urls):
-        """Validate multiple endpoints"""
-        for url in urls:
-            self.validate_endpoint(url)
+    def validate_multiple(self, urls, concurrency=50, per_host=4, rate=None):
+        """Validate multiple endpoints concurrently (see validate_stream)"""
+        async def run():
+            async for _ in self.validate_stream(urls, concurrency, per_host, rate):
+                pass
+
+        asyncio.run(run())
+
+    async def validate_stream(self, urls, concurrency=50, per_host=4, rate=None):
+        """Yield endpoint results as each URL finishes.
+
+        At most concurrency endpoints are in flight overall and per_host
+        against any one origin; rate caps new endpoints started per
+        second. URLs are consumed lazily, so huge lists are never held
+        in memory. Failed endpoints are recorded in results['errors'].
+        """
+        async for _, result in self._stream(urls, self.validate_endpoint, concurrency, per_host, rate):
+            if result is not None:
+                yield result
+
+    async def _stream(self, urls, worker, concurrency, per_host, rate):
+        """Yield (url, worker(url)) pairs as they finish under the concurrency limits"""
+        loop = asyncio.get_running_loop()
+        limiter = TokenBucket(rate) if rate else None
+        # origin -> [semaphore, URLs in flight]
+        host_limits = {}
+        self.pool_size = max(self.pool_size, per_host)
+
+        async def validate(url):
+            # Per-origin state lives only while the origin has URLs in flight
+            origin = self._origin(url)
+            host = host_limits.get(origin)
+            if host is None:
+                host = host_limits[origin] = [asyncio.Semaphore(per_host), 0]
+            host[1] += 1
+            try:
+                async with host[0]:
+                    if limiter:
+                        await limiter.acquire_async()
+                    return url, await loop.run_in_executor(executor, worker, url)
+            finally:
+                host[1] -= 1
+                if not host[1]:
+                    del host_limits[origin]
+                    self.close_session(url)
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = set()
+        try:
+            for url in urls:
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(validate(url)))
+
+            for task in asyncio.as_completed(pending):
+                yield await task
+            pending = set()
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.close()
+
+    def validate_checkpointed(self, urls, checkpoint, concurrency=50, per_host=4, rate=None,
+                              retry_errors=False):
+        """Validate a large URL list, persisting every result as it completes.
+
+        checkpoint is a ValidationCheckpoint (or a path to one). URLs are
+        normalised and skipped if already recorded or in flight, so a rerun
+        with the same list resumes where the last one stopped. Results go
+        only to the checkpoint and per-host limits and sessions are dropped
+        as each host goes idle, so memory is bounded by concurrency rather
+        than by input size; read results back with checkpoint.iter_results().
+        Returns run counts.
+        """
+        from core.active.validation_store import ValidationCheckpoint, normalise_url
+
+        store = checkpoint if isinstance(checkpoint, ValidationCheckpoint) else ValidationCheckpoint(checkpoint)
+        stats = {'dispatched': 0, 'skipped': 0, 'completed': 0, 'errors': 0}
+        in_flight = set()
+
+        def dispatch():
+            for url in urls:
+                url = normalise_url(url)
+                if not url or url in in_flight or store.is_done(url, retry_errors):
+                    stats['skipped'] += 1
+                    continue
+                in_flight.add(url)
+                stats['dispatched'] += 1
+                yield url
+
+        async def run():
+            async for url, (result, error) in self._stream(dispatch(), self._validate,
+                                                           concurrency, per_host, rate):
+                store.record(url, result, error)
+                in_flight.discard(url)
+                stats['errors' if error else 'completed'] += 1
+
+        try:
+            asyncio.run(run())
+        finally:
+            store.flush()
+            if store is not checkpoint:
+                store.close()
+        return stats
 
     def to_json(self):
         """Return results as JSON"""
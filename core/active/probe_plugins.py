@@ -0,0 +1,169 @@
+import threading
+import time
+from core.http_fetch import BoundedReader, open_stream
+
+# Plugin name -> ProbePlugin instance, in registration order
+PROBE_PLUGINS = {}
+
+
+def register_probe(plugin_class):
+    """Class decorator adding a ProbePlugin subclass to PROBE_PLUGINS"""
+    PROBE_PLUGINS[plugin_class.name] = plugin_class()
+    return plugin_class
+
+
+class ProbePlugin:
+    """One active probe: the request to send and a matcher over the response.
+
+    The body is streamed in chunks and match() is called on the text read
+    so far, so a probe stops downloading as soon as it has matched or
+    max_bytes is reached. requires names plugins (or 'base' for the base
+    fetch) that must have completed without error for this one to run.
+    """
+
+    name = None
+    vulnerability = None
+    requires = ('base',)
+    max_bytes = 65536
+    timeout = 5
+    deadline = 15
+
+    def build_url(self, url):
+        return url
+
+    def match(self, response, body):
+        return False
+
+
+@register_probe
+class DirectoryTraversalProbe(ProbePlugin):
+    name = 'directory_traversal'
+    vulnerability = 'directory_traversal'
+
+    def build_url(self, url):
+        return f"{url}/../../../../etc/passwd"
+
+    def match(self, response, body):
+        return "root:" in body
+
+
+@register_probe
+class SQLErrorProbe(ProbePlugin):
+    name = 'sqli'
+    vulnerability = 'possible_sqli'
+
+    def build_url(self, url):
+        return f"{url}?id=1'"
+
+    def match(self, response, body):
+        return "SQL syntax" in body or "mysql" in body.lower()
+
+
+@register_probe
+class ReflectedXSSProbe(ProbePlugin):
+    name = 'xss'
+    vulnerability = 'possible_xss'
+
+    def build_url(self, url):
+        return f"{url}?q=<script>alert(1)</script>"
+
+    def match(self, response, body):
+        return "<script>alert(1)</script>" in body
+
+
+class ProbeEngine:
+    """Run probe plugins against an endpoint over its pooled session"""
+
+    def __init__(self, plugins=None, chunk_size=8192):
+        names = plugins if plugins is not None else list(PROBE_PLUGINS)
+        unknown = [name for name in names if name not in PROBE_PLUGINS]
+        if unknown:
+            raise ValueError(f"Unknown probe plugins: {', '.join(unknown)}")
+        self.plugins = self._ordered([PROBE_PLUGINS[name] for name in names])
+        self.chunk_size = chunk_size
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _ordered(self, plugins):
+        """Order plugins so each runs after the plugins it requires"""
+        ordered = []
+        placed = {'base'}
+        remaining = list(plugins)
+        while remaining:
+            ready = [p for p in remaining if all(r in placed or r not in PROBE_PLUGINS for r in p.requires)]
+            if not ready:
+                raise ValueError(f"Circular probe dependencies: {', '.join(p.name for p in remaining)}")
+            for plugin in ready:
+                ordered.append(plugin)
+                placed.add(plugin.name)
+                remaining.remove(plugin)
+        return ordered
+
+    def run(self, session, url, result, base_ok=True):
+        """Run every plugin, recording outcomes in result['probes']"""
+        outcomes = {'base': 'ok' if base_ok else 'error'}
+        probes = result.setdefault('probes', {})
+        for plugin in self.plugins:
+            failed = [r for r in plugin.requires if outcomes.get(r) in ('error', 'skipped')]
+            if failed:
+                outcomes[plugin.name] = 'skipped'
+                probes[plugin.name] = {'outcome': 'skipped', 'reason': f"requires {', '.join(failed)}"}
+                self._record(plugin.name, 'skipped', 0)
+                continue
+
+            started = time.perf_counter()
+            entry = {}
+            try:
+                matched, entry['bytes'] = self._probe(session, plugin, url)
+                outcome = 'matched' if matched else 'clean'
+                if matched and plugin.vulnerability:
+                    result['vulnerabilities'].append(plugin.vulnerability)
+            except Exception as e:
+                outcome = 'error'
+                entry['error'] = str(e)
+            elapsed = time.perf_counter() - started
+            entry.update(outcome=outcome, elapsed=round(elapsed, 4))
+            outcomes[plugin.name] = outcome
+            probes[plugin.name] = entry
+            self._record(plugin.name, outcome, elapsed)
+
+    def _probe(self, session, plugin, url):
+        started = time.monotonic()
+        with open_stream(session, plugin.build_url(url), timeout=plugin.timeout,
+                         deadline=plugin.deadline) as response:
+            if plugin.max_bytes <= 0:
+                return plugin.match(response, ''), 0
+
+            reader = BoundedReader(response, plugin.max_bytes, plugin.deadline, self.chunk_size, started)
+            body = ''
+            for text in reader.iter_text():
+                body += text
+                if text and plugin.match(response, body):
+                    return True, reader.bytes_read
+            return False, reader.bytes_read
+
+    def _record(self, name, outcome, elapsed):
+        with self._lock:
+            stats = self.stats.setdefault(name, {
+                'runs': 0, 'matched': 0, 'errors': 0, 'skipped': 0,
+                'total_time': 0.0, 'max_time': 0.0
+            })
+            if outcome == 'skipped':
+                stats['skipped'] += 1
+                return
+            stats['runs'] += 1
+            stats['matched'] += outcome == 'matched'
+            stats['errors'] += outcome == 'error'
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+
+    def summary(self):
+        """Per-plugin counts with average and max latency in seconds"""
+        with self._lock:
+            return {
+                name: dict(stats,
+                           total_time=round(stats['total_time'], 4),
+                           max_time=round(stats['max_time'], 4),
+                           avg_time=round(stats['total_time'] / stats['runs'], 4) if stats['runs'] else 0.0)
+                for name, stats in self.stats.items()
+            }
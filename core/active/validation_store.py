@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalise_url(url):
+    """Canonical form used to deduplicate endpoints.
+
+    Adds a missing http scheme, lowercases scheme and host, drops default
+    ports and fragments. Userinfo, paths and queries are kept as given.
+    """
+    url = (url or '').strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = f"http://{url}"
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        port = parts.port
+    except ValueError:
+        return None
+    if not host:
+        return None
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    if '@' in parts.netloc:
+        # Credentials are kept verbatim: the normalised URL is what gets fetched
+        userinfo = parts.netloc.rpartition('@')[0]
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path, parts.query, ''))
+
+
+class ValidationCheckpoint:
+    """Append-only SQLite record of validated endpoints keyed by normalised URL"""
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS endpoints (
+                url TEXT PRIMARY KEY,
+                status TEXT,
+                error TEXT,
+                result TEXT,
+                completed_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def is_done(self, url, retry_errors=False):
+        """Whether url already has a recorded outcome (errors count unless retry_errors)"""
+        row = self.conn.execute("SELECT status FROM endpoints WHERE url = ?", (url,)).fetchone()
+        return row is not None and not (retry_errors and row[0] == 'error')
+
+    def record(self, url, result, error=None):
+        """Record an endpoint's result, or its error"""
+        self.conn.execute(
+            # Only a retried error is ever replaced
+            "INSERT INTO endpoints (url, status, error, result, completed_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET status = excluded.status, error = excluded.error, "
+            "result = excluded.result, completed_at = excluded.completed_at WHERE endpoints.status = 'error'",
+            (url, 'error' if error else 'done', error,
+             json.dumps(result, default=str) if result is not None else None, time.time())
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM endpoints").fetchone()[0]
+
+    def counts(self):
+        self.flush()
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM endpoints GROUP BY status").fetchall())
+
+    def iter_results(self):
+        """Stream completed endpoint results in completion order"""
+        self.flush()
+        cursor = self.conn.cursor()
+        for (data,) in cursor.execute(
+                "SELECT result FROM endpoints WHERE status = 'done' ORDER BY completed_at"):
+            yield json.loads(data)
+
+    def iter_errors(self):
+        """Stream (url, error) pairs for endpoints that failed"""
+        self.flush()
+        cursor = self.conn.cursor()
+        yield from cursor.execute("SELECT url, error FROM endpoints WHERE status = 'error' ORDER BY completed_at")
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,190 @@
+import codecs
+import time
+import zlib
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_DEADLINE = 30
+DEFAULT_TIMEOUT = 10
+# Only encodings decoded here are advertised, so brotli never reaches us
+ACCEPT_ENCODING = 'gzip, deflate'
+
+
+def _decompressor(content_encoding):
+    encoding = (content_encoding or '').lower().strip()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        # Accept both zlib-wrapped and (non-conforming) raw deflate
+        return _DeflateDecompressor()
+    return None
+
+
+class _DeflateDecompressor:
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+        self._started = False
+
+    def decompress(self, data, max_length=0):
+        if not self._started:
+            self._started = True
+            try:
+                return self._decompressor.decompress(data, max_length)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(data, max_length)
+
+
+class BoundedReader:
+    """Stream a requests response body within byte and time limits.
+
+    Compressed bodies are decompressed incrementally with the output
+    capped at max_bytes, so a small gzip bomb cannot expand in memory.
+    Wire bytes are capped at max_bytes too, and reading stops once the
+    deadline (seconds since the request started) passes: every read
+    returns whatever has arrived (read1) and the socket timeout is cut to
+    the time left, so a slow-drip server cannot stretch it. Hitting a limit
+    is not an error: truncated and reason describe why reading stopped,
+    and callers match on the partial body.
+    """
+
+    def __init__(self, response, max_bytes=DEFAULT_MAX_BYTES, deadline=DEFAULT_DEADLINE,
+                 chunk_size=8192, started=None):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.expires = (started or time.monotonic()) + deadline if deadline else None
+        self.bytes_read = 0
+        self.wire_bytes = 0
+        self.truncated = False
+        self.reason = None
+
+    def _stop(self, reason):
+        self.truncated = True
+        self.reason = reason
+
+    def _time_left(self):
+        return self.expires - time.monotonic() if self.expires else None
+
+    def _socket(self):
+        connection = getattr(self.response.raw, 'connection', None)
+        return getattr(connection, 'sock', None)
+
+    def _raw_chunks(self):
+        """Yield wire bytes as they arrive, never blocking past the deadline"""
+        raw = self.response.raw
+        sock = self._socket()
+        idle_timeout = sock.gettimeout() if sock else None
+        while True:
+            time_left = self._time_left()
+            if time_left is not None:
+                if time_left <= 0:
+                    self._stop('deadline')
+                    return
+                if sock:
+                    sock.settimeout(min(idle_timeout, time_left) if idle_timeout else time_left)
+            try:
+                data = raw.read1(self.chunk_size, decode_content=False)
+            except Exception:
+                if self.expires and self._time_left() <= 0:
+                    self._stop('deadline')
+                    return
+                raise
+            if not data:
+                return
+            yield data
+
+    def __iter__(self):
+        """Yield decoded body bytes chunk by chunk"""
+        decompressor = _decompressor(self.response.headers.get('Content-Encoding'))
+        for raw in self._raw_chunks():
+            self.wire_bytes += len(raw)
+            remaining = self.max_bytes - self.bytes_read
+            if decompressor:
+                data = decompressor.decompress(raw, remaining + 1)
+            else:
+                data = raw
+            if len(data) > remaining:
+                data = data[:remaining]
+                self._stop('decompression_limit' if decompressor else 'max_bytes')
+            elif self.wire_bytes >= self.max_bytes and decompressor:
+                self._stop('max_bytes')
+
+            if data:
+                self.bytes_read += len(data)
+                yield data
+            if self.truncated:
+                return
+
+    def iter_text(self):
+        """Yield decoded text chunks"""
+        decoder = codecs.getincrementaldecoder(self.response.encoding or 'utf-8')(errors='replace')
+        for data in self:
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+
+
+class FetchResult:
+    """Status, headers and a possibly partial body of a bounded fetch"""
+
+    def __init__(self, response, body, reader, elapsed):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = response.url
+        # Redirect responses that were followed to reach this one, oldest first
+        self.history = response.history
+        self.encoding = response.encoding
+        self.content = body
+        self.truncated = reader.truncated
+        self.reason = reader.reason
+        self.wire_bytes = reader.wire_bytes
+        self.elapsed = elapsed
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+def open_stream(session, url, method='GET', timeout=DEFAULT_TIMEOUT, deadline=None, **kwargs):
+    """Send a streaming request that only accepts encodings BoundedReader can decode.
+
+    With a deadline, connecting and waiting for the response headers share
+    that budget: the connect and read timeouts are capped at the deadline
+    and urllib3's total timeout stops the header wait at whatever the
+    connect left over. The read timeout applies per socket read, so a
+    server dripping header bytes faster than that can still overrun the
+    deadline until the headers are complete; BoundedReader enforces it
+    from the first body read on.
+    """
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+    if deadline:
+        from urllib3.util import Timeout
+
+        limit = min(timeout, deadline) if timeout else deadline
+        timeout = Timeout(connect=limit, read=limit, total=deadline)
+    return session.request(method, url, headers=headers, timeout=timeout, stream=True, **kwargs)
+
+
+def fetch(url, session=None, method='GET', max_bytes=DEFAULT_MAX_BYTES, deadline=DEFAULT_DEADLINE,
+          timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Fetch a URL reading at most max_bytes of body before deadline seconds.
+
+    timeout is the connect/idle timeout passed to requests; deadline bounds
+    the whole request, headers included (see open_stream for the one gap).
+    A response that arrives after the deadline comes back truncated with an
+    empty body.
+    """
+    import requests
+
+    started = time.monotonic()
+    owns_session = session is None
+    session = session or requests.Session()
+    try:
+        with open_stream(session, url, method, timeout=timeout, deadline=deadline, **kwargs) as response:
+            # The reader checks the time left before its first read
+            reader = BoundedReader(response, max_bytes, deadline, started=started)
+            body = b''.join(reader)
+            return FetchResult(response, body, reader, time.monotonic() - started)
+    finally:
+        if owns_session:
+            session.close()
@@ -0,0 +1,314 @@
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import tempfile
+from collections import Counter
+
+SEVERITY_ORDER = ['critical', 'high', 'medium', 'low', 'info']
+
+
+def severity_rank(severity):
+    """Sort key placing critical first and unknown severities last"""
+    try:
+        return SEVERITY_ORDER.index(severity)
+    except ValueError:
+        return len(SEVERITY_ORDER)
+
+
+EVIDENCE_MASKS = [
+    (re.compile(r'[a-z][a-z0-9+.-]*://\S+'), '<url>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b'), '<ip>'),
+    (re.compile(r'\b(?:[a-z0-9-]+\.)+[a-z]{2,}\b'), '<host>'),
+    (re.compile(r'\b[0-9a-f]{8,}\b'), '<hex>'),
+    (re.compile(r'\d+'), '<n>')
+]
+
+
+def _normalise(text, asset=None):
+    text = ' '.join(str(text or '').lower().split())
+    if asset:
+        text = text.replace(str(asset).lower(), '<asset>')
+    return text
+
+
+def finding_fingerprint(title, description, evidence, asset=None):
+    """Hash identifying the same issue across assets.
+
+    Title and description are compared case- and whitespace-insensitively;
+    evidence additionally has URLs, hosts, IPs, hex ids and numbers masked
+    so per-host details do not split one issue into many.
+    """
+    masked = _normalise(evidence, asset)
+    for pattern, placeholder in EVIDENCE_MASKS:
+        masked = pattern.sub(placeholder, masked)
+    key = '\x1f'.join([_normalise(title, asset), _normalise(description, asset), masked])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def merge_finding(existing, finding, asset=None, max_assets=1000):
+    """Fold another occurrence into an aggregated finding"""
+    existing['occurrences'] = existing.get('occurrences', 1) + 1
+    if severity_rank(finding.get('severity')) < severity_rank(existing.get('severity')):
+        existing['severity'] = finding['severity']
+    assets = existing.setdefault('affected_assets', [])
+    if asset and asset not in assets:
+        if len(assets) < max_assets:
+            assets.append(asset)
+        else:
+            existing['assets_truncated'] = True
+    return existing
+
+
+class MemoryFindingsStore:
+    """Findings kept in a plain list (the default ReportBuilder behaviour)"""
+
+    # get/put by fingerprint, needed by ReportBuilder(aggregate_findings=True)
+    supports_aggregation = True
+
+    def __init__(self, findings=None):
+        self.findings = findings if findings is not None else []
+        self._index = None
+
+    def append(self, finding):
+        self.findings.append(finding)
+
+    def get(self, fingerprint):
+        """Return the aggregated finding with this fingerprint, or None"""
+        if self._index is None:
+            self._index = {f['fingerprint']: f for f in self.findings if 'fingerprint' in f}
+        return self._index.get(fingerprint)
+
+    def put(self, fingerprint, finding):
+        """Insert or replace the aggregated finding with this fingerprint"""
+        existing = self.get(fingerprint)
+        if existing is None:
+            self.findings.append(finding)
+        elif existing is not finding:
+            existing.clear()
+            existing.update(finding)
+            return
+        self._index[fingerprint] = finding
+
+    def __iter__(self):
+        return iter(self.findings)
+
+    def __len__(self):
+        return len(self.findings)
+
+    def sorted_by(self, field='severity'):
+        """Iterate findings ordered by field (severity orders critical first)"""
+        if field == 'severity':
+            return iter(sorted(self.findings, key=lambda f: severity_rank(f.get('severity'))))
+        return iter(sorted(self.findings, key=lambda f: str(f.get(field, ''))))
+
+    def grouped_by(self, field='severity'):
+        """Yield (value, findings iterator) groups in sorted_by(field) order"""
+        return itertools.groupby(self.sorted_by(field), key=lambda f: f.get(field))
+
+    def counts_by(self, field='severity'):
+        return dict(Counter(f.get(field) for f in self.findings))
+
+    def clear(self):
+        del self.findings[:]
+        self._index = None
+
+    def close(self):
+        pass
+
+
+class JSONLFindingsStore:
+    """Append-only findings file with one JSON document per line.
+
+    Iteration re-reads the file lazily. Severity views take one pass per
+    severity level; other sorted views use an external merge sort over
+    chunk_size findings at a time, so memory never grows with the file.
+    """
+
+    supports_aggregation = False
+
+    def __init__(self, path, chunk_size=10000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._count = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._count = sum(1 for line in f if line.strip())
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, finding):
+        self._file.write(json.dumps(finding) + '\n')
+        self._count += 1
+
+    def __iter__(self):
+        self._file.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self):
+        return self._count
+
+    def get(self, fingerprint):
+        raise ValueError("JSONL findings store is append-only; use SQLiteFindingsStore to aggregate findings")
+
+    def put(self, fingerprint, finding):
+        raise ValueError("JSONL findings store is append-only; use SQLiteFindingsStore to aggregate findings")
+
+    def sorted_by(self, field='severity'):
+        """Iterate findings ordered by field (severity orders critical first)"""
+        if field == 'severity':
+            return self._iter_by_severity()
+        return self._external_sort(lambda f: str(f.get(field, '')))
+
+    def grouped_by(self, field='severity'):
+        """Yield (value, findings iterator) groups in sorted_by(field) order"""
+        return itertools.groupby(self.sorted_by(field), key=lambda f: f.get(field))
+
+    def counts_by(self, field='severity'):
+        return dict(Counter(f.get(field) for f in self))
+
+    def clear(self):
+        self._file.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._count = 0
+
+    def close(self):
+        self._file.close()
+
+    def _iter_by_severity(self):
+        for rank in range(len(SEVERITY_ORDER) + 1):
+            for finding in self:
+                if severity_rank(finding.get('severity')) == rank:
+                    yield finding
+
+    def _external_sort(self, key):
+        runs = []
+        try:
+            findings = iter(self)
+            while True:
+                chunk = list(itertools.islice(findings, self.chunk_size))
+                if not chunk:
+                    break
+                chunk.sort(key=key)
+                run = tempfile.TemporaryFile('w+', encoding='utf-8')
+                for finding in chunk:
+                    run.write(json.dumps(finding) + '\n')
+                run.seek(0)
+                runs.append(run)
+
+            readers = [(json.loads(line) for line in run) for run in runs]
+            yield from heapq.merge(*readers, key=key)
+        finally:
+            for run in runs:
+                run.close()
+
+
+class SQLiteFindingsStore:
+    """Findings stored in SQLite, with sorting and grouping done by the database"""
+
+    supports_aggregation = True
+
+    SORT_COLUMNS = {
+        'severity': 'severity_rank',
+        'title': 'title'
+    }
+
+    def __init__(self, path, commit_every=1000):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS findings (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                severity TEXT,
+                severity_rank INTEGER,
+                fingerprint TEXT,
+                data TEXT
+            )
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(findings)")]
+        if 'fingerprint' not in columns:
+            self.conn.execute("ALTER TABLE findings ADD COLUMN fingerprint TEXT")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_findings_fingerprint ON findings (fingerprint)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings (severity_rank)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_title ON findings (title)")
+        self.conn.commit()
+
+    def append(self, finding):
+        self.conn.execute(
+            "INSERT INTO findings (title, severity, severity_rank, data) VALUES (?, ?, ?, ?)",
+            (finding.get('title'), finding.get('severity'),
+             severity_rank(finding.get('severity')), json.dumps(finding))
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def get(self, fingerprint):
+        """Return the aggregated finding with this fingerprint, or None"""
+        row = self.conn.execute("SELECT data FROM findings WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint, finding):
+        """Insert or replace the aggregated finding with this fingerprint"""
+        self.conn.execute(
+            "INSERT INTO findings (title, severity, severity_rank, fingerprint, data) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (fingerprint) DO UPDATE SET severity = excluded.severity, "
+            "severity_rank = excluded.severity_rank, data = excluded.data",
+            (finding.get('title'), finding.get('severity'), severity_rank(finding.get('severity')),
+             fingerprint, json.dumps(finding))
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def __iter__(self):
+        return self._query("SELECT data FROM findings ORDER BY id")
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+
+    def sorted_by(self, field='severity'):
+        """Iterate findings ordered by field (severity orders critical first)"""
+        column = self.SORT_COLUMNS.get(field)
+        if column:
+            return self._query(f"SELECT data FROM findings ORDER BY {column}, id")
+        return self._query("SELECT data FROM findings ORDER BY json_extract(data, ?), id",
+                           (f"$.{field}",))
+
+    def grouped_by(self, field='severity'):
+        """Yield (value, findings iterator) groups in sorted_by(field) order"""
+        return itertools.groupby(self.sorted_by(field), key=lambda f: f.get(field))
+
+    def counts_by(self, field='severity'):
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT json_extract(data, ?), COUNT(*) FROM findings GROUP BY 1", (f"$.{field}",))
+        return dict(rows.fetchall())
+
+    def clear(self):
+        self.conn.execute("DELETE FROM findings")
+        self.flush()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def _query(self, sql, params=()):
+        self.flush()
+        # A dedicated cursor streams rows instead of fetching them all
+        cursor = self.conn.cursor()
+        for (data,) in cursor.execute(sql, params):
+            yield json.loads(data)
@@ -0,0 +1,372 @@
+import hashlib
+import json
+import os
+from urllib.parse import urlparse
+
+# Collector class name -> adapter name
+COLLECTOR_NAMES = {
+    'DomainTracer': 'domain_tracer',
+    'ShodanClient': 'shodan',
+    'CensysClient': 'censys',
+    'SecurityTrailsClient': 'securitytrails',
+    'OTXClient': 'otx',
+    'WaybackConnector': 'wayback',
+    'BucketScanner': 'bucket_scanner'
+}
+
+OTX_INDICATOR_TYPES = {
+    'domain': 'domain',
+    'hostname': 'domain',
+    'IPv4': 'ip',
+    'IPv6': 'ip',
+    'URL': 'url',
+    'email': 'person'
+}
+
+
+def detect_collector(results):
+    """Guess which collector produced a results dict from its keys"""
+    if 'subdomains' in results and 'whois' in results:
+        return 'domain_tracer'
+    if 'buckets' in results:
+        return 'bucket_scanner'
+    if 'snapshots' in results:
+        return 'wayback'
+    if 'pulses' in results:
+        return 'otx'
+    if 'domain_info' in results:
+        return 'securitytrails'
+    if 'certificates' in results:
+        return 'censys'
+    if 'hosts' in results:
+        return 'shodan'
+    return None
+
+
+def _node(node_id, node_type, **attrs):
+    # Missing values must not overwrite what another collector already recorded
+    return (node_id, node_type, {key: value for key, value in attrs.items() if value is not None})
+
+
+def _edge(source, target, relationship, **attrs):
+    return (source, target, relationship, attrs)
+
+
+def _field(record, dotted):
+    """Read 'a.b.c' from either flat Censys search rows or nested view documents"""
+    if dotted in record:
+        return record[dotted]
+    value = record
+    for part in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _url_host(url):
+    """Return the hostname of a URL or a CDX SURT key such as 'com,example)/path'"""
+    if ')/' in url and '://' not in url:
+        return '.'.join(reversed(url.split(')', 1)[0].split(',')))
+    if '://' not in url:
+        url = f"http://{url}"
+    return urlparse(url).hostname
+
+
+def adapt_domain_tracer(results, context):
+    """Yield (record, nodes, edges) for DomainTracer results"""
+    domain = results.get('domain') or context.get('domain')
+    if not domain:
+        return
+
+    dns = results.get('dns', {})
+    for ip in dns.get('a_records', []):
+        yield (('a', domain, ip),
+               [_node(domain, 'domain'), _node(ip, 'ip')],
+               [_edge(domain, ip, 'resolves_to')])
+
+    for relationship, key in (('mail_server', 'mx_records'), ('name_server', 'ns_records')):
+        for host in dns.get(key, []):
+            host = host.rstrip('.')
+            yield ((key, domain, host),
+                   [_node(domain, 'domain'), _node(host, 'domain')],
+                   [_edge(domain, host, relationship)])
+
+    whois = results.get('whois', {})
+    if whois.get('registrar'):
+        yield (('registrar', domain, whois['registrar']),
+               [_node(domain, 'domain'), _node(whois['registrar'], 'organization')],
+               [_edge(domain, whois['registrar'], 'registered_with')])
+    for host in whois.get('name_servers', []):
+        host = host.lower().rstrip('.')
+        yield (('whois_ns', domain, host),
+               [_node(domain, 'domain'), _node(host, 'domain')],
+               [_edge(domain, host, 'name_server')])
+
+    for subdomain in results.get('subdomains', []):
+        yield (('subdomain', domain, subdomain),
+               [_node(domain, 'domain'), _node(subdomain, 'domain')],
+               [_edge(subdomain, domain, 'subdomain_of')])
+
+
+def adapt_shodan(results, context):
+    """Yield (record, nodes, edges) for ShodanClient results"""
+    for host in results.get('hosts', []) + results.get('search_results', []):
+        ip = host.get('ip_str')
+        if not ip:
+            continue
+
+        nodes = [_node(ip, 'ip', ports=host.get('ports', []), asn=host.get('asn'),
+                       country=host.get('country_code'))]
+        edges = []
+        if host.get('org'):
+            nodes.append(_node(host['org'], 'organization'))
+            edges.append(_edge(ip, host['org'], 'owned_by'))
+        for hostname in host.get('hostnames', []) + host.get('domains', []):
+            nodes.append(_node(hostname, 'domain'))
+            edges.append(_edge(hostname, ip, 'resolves_to'))
+
+        # host() returns services under 'data', search() returns one service per match
+        for service in host.get('data', [host]):
+            if service.get('port') is None:
+                continue
+            service_id = f"{ip}:{service['port']}"
+            nodes.append(_node(service_id, 'service', label=service.get('product') or service_id,
+                               port=service['port'], product=service.get('product')))
+            edges.append(_edge(ip, service_id, 'exposes'))
+
+        yield host, nodes, edges
+
+
+def adapt_censys(results, context):
+    """Yield (record, nodes, edges) for CensysClient results"""
+    for host in results.get('hosts', []):
+        ip = _field(host, 'ip')
+        if not ip:
+            continue
+        nodes = [_node(ip, 'ip', protocols=_field(host, 'protocols') or [],
+                       country=_field(host, 'location.country'))]
+        edges = []
+        for protocol in _field(host, 'protocols') or []:
+            service_id = f"{ip}:{protocol.split('/')[0]}"
+            nodes.append(_node(service_id, 'service', label=protocol))
+            edges.append(_edge(ip, service_id, 'exposes'))
+        yield host, nodes, edges
+
+    for cert in results.get('certificates', []):
+        fingerprint = _field(cert, 'parsed.fingerprint_sha256')
+        if not fingerprint:
+            continue
+        nodes = [_node(fingerprint, 'certificate', label=fingerprint[:16],
+                       subject=_field(cert, 'parsed.subject_dn'),
+                       issuer=_field(cert, 'parsed.issuer_dn'))]
+        edges = []
+        for name in _field(cert, 'parsed.names') or []:
+            nodes.append(_node(name, 'domain'))
+            edges.append(_edge(fingerprint, name, 'issued_for'))
+        yield cert, nodes, edges
+
+
+def adapt_securitytrails(results, context):
+    """Yield (record, nodes, edges) for SecurityTrailsClient results"""
+    for info in results.get('domain_info', []):
+        domain = info.get('hostname') or context.get('domain')
+        if not domain:
+            continue
+        current = info.get('current_dns', {})
+        nodes = [_node(domain, 'domain')]
+        edges = []
+        for value in current.get('a', {}).get('values', []):
+            if value.get('ip'):
+                nodes.append(_node(value['ip'], 'ip', organization=value.get('ip_organization')))
+                edges.append(_edge(domain, value['ip'], 'resolves_to'))
+        for value in current.get('mx', {}).get('values', []):
+            if value.get('hostname'):
+                nodes.append(_node(value['hostname'], 'domain'))
+                edges.append(_edge(domain, value['hostname'], 'mail_server'))
+        for value in current.get('ns', {}).get('values', []):
+            if value.get('nameserver'):
+                nodes.append(_node(value['nameserver'], 'domain'))
+                edges.append(_edge(domain, value['nameserver'], 'name_server'))
+        yield info, nodes, edges
+
+    # History records do not name their domain, so link them only when given one
+    domain = context.get('domain')
+    for record in results.get('dns_records', []):
+        nodes = []
+        edges = []
+        organizations = record.get('organizations', [])
+        for value in record.get('values', []):
+            ip = value.get('ip')
+            if not ip:
+                continue
+            nodes.append(_node(ip, 'ip', first_seen=record.get('first_seen'),
+                               last_seen=record.get('last_seen')))
+            if domain:
+                nodes.append(_node(domain, 'domain'))
+                edges.append(_edge(domain, ip, 'resolved_to'))
+            for organization in organizations:
+                nodes.append(_node(organization, 'organization'))
+                edges.append(_edge(ip, organization, 'owned_by'))
+        if nodes:
+            yield record, nodes, edges
+
+
+def adapt_otx(results, context):
+    """Yield (record, nodes, edges) for OTXClient results"""
+    def indicator_nodes(pulse_id, indicator, indicator_type):
+        node_type = OTX_INDICATOR_TYPES.get(indicator_type, 'indicator')
+        if indicator_type.startswith('FileHash'):
+            node_type = 'file'
+        return (_node(indicator, node_type, otx_type=indicator_type),
+                _edge(indicator, pulse_id, 'referenced_in'))
+
+    for pulse in results.get('pulses', []):
+        if not pulse.get('id'):
+            continue
+        pulse_id = f"otx:{pulse['id']}"
+        nodes = [_node(pulse_id, 'threat', label=pulse.get('name') or pulse_id,
+                       tags=pulse.get('tags', []))]
+        edges = []
+        for indicator in pulse.get('indicators', []):
+            if indicator.get('indicator'):
+                node, edge = indicator_nodes(pulse_id, indicator['indicator'], indicator.get('type', ''))
+                nodes.append(node)
+                edges.append(edge)
+        yield pulse, nodes, edges
+
+    for details in results.get('indicators', []):
+        indicator = details.get('indicator')
+        pulses = details.get('pulse_info', {}).get('pulses', [])
+        if not indicator or not pulses:
+            continue
+        nodes = []
+        edges = []
+        for pulse in pulses:
+            pulse_id = f"otx:{pulse['id']}"
+            node, edge = indicator_nodes(pulse_id, indicator, details.get('type', ''))
+            nodes.extend([_node(pulse_id, 'threat', label=pulse.get('name') or pulse_id), node])
+            edges.append(edge)
+        yield details, nodes, edges
+
+
+def adapt_wayback(results, context):
+    """Yield (record, nodes, edges) for WaybackConnector results"""
+    for snapshot in results.get('snapshots', []) + results.get('pages', []):
+        url = snapshot.get('url')
+        host = _url_host(url) if url else None
+        if not host:
+            continue
+        yield ((url, snapshot.get('timestamp')),
+               [_node(host, 'domain'),
+                _node(url, 'url', last_capture=snapshot.get('timestamp'), status=snapshot.get('status'))],
+               [_edge(url, host, 'archived_under')])
+
+
+def adapt_bucket_scanner(results, context):
+    """Yield (record, nodes, edges) for BucketScanner results"""
+    domain = context.get('domain')
+    for bucket in results.get('buckets', []):
+        name = bucket.get('name')
+        if not name:
+            continue
+        attrs = {key: bucket[key] for key in ('public', 'public_permissions', 'policy_public', 'region')
+                 if key in bucket}
+        nodes = [_node(name, 'bucket', **attrs)]
+        edges = []
+        if domain:
+            nodes.append(_node(domain, 'domain'))
+            edges.append(_edge(name, domain, 'candidate_of'))
+        yield bucket, nodes, edges
+
+
+ADAPTERS = {
+    'domain_tracer': adapt_domain_tracer,
+    'shodan': adapt_shodan,
+    'censys': adapt_censys,
+    'securitytrails': adapt_securitytrails,
+    'otx': adapt_otx,
+    'wayback': adapt_wayback,
+    'bucket_scanner': adapt_bucket_scanner
+}
+
+
+class GraphIngestor:
+    """Turn collector results into GraphEngine nodes and edges with batched inserts.
+
+    Every record is fingerprinted, so re-ingesting the same results (or a
+    later report from the same collector) only inserts records not seen
+    before. Pass state_file to remember fingerprints across runs.
+    """
+
+    def __init__(self, engine, batch_size=5000, state_file=None):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.state_file = state_file
+        self.seen = set()
+        self.stats = {
+            'records': 0,
+            'skipped': 0,
+            'nodes': 0,
+            'edges': 0
+        }
+
+        if state_file and os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                self.seen = set(json.load(f))
+
+    def ingest(self, source, collector=None, **context):
+        """Ingest a collector instance or its results dict; returns records added"""
+        results = getattr(source, 'results', source)
+        if not collector:
+            collector = COLLECTOR_NAMES.get(type(source).__name__) or detect_collector(results)
+        if collector not in ADAPTERS:
+            raise ValueError(f"No graph adapter for collector: {collector}")
+
+        nodes = []
+        edges = []
+        added = 0
+        for record, record_nodes, record_edges in ADAPTERS[collector](results, context):
+            fingerprint = self._fingerprint(collector, record)
+            if fingerprint in self.seen:
+                self.stats['skipped'] += 1
+                continue
+            self.seen.add(fingerprint)
+            added += 1
+            nodes.extend(record_nodes)
+            edges.extend(record_edges)
+            if len(nodes) + len(edges) >= self.batch_size:
+                self._flush(nodes, edges)
+                nodes = []
+                edges = []
+
+        self._flush(nodes, edges)
+        self.stats['records'] += added
+        return added
+
+    def ingest_report_file(self, path, collector=None, **context):
+        """Ingest a JSON report saved by a collector's save_report()"""
+        with open(path, 'r') as f:
+            results = json.load(f)
+        return self.ingest(results, collector, **context)
+
+    def save_state(self):
+        """Persist record fingerprints for the next incremental run"""
+        if not self.state_file:
+            return None
+        with open(self.state_file, 'w') as f:
+            json.dump(sorted(self.seen), f)
+        return self.state_file
+
+    def _flush(self, nodes, edges):
+        # Nodes first so edges never create untyped endpoints
+        if nodes:
+            self.engine.add_nodes_from(nodes)
+            self.stats['nodes'] += len(nodes)
+        if edges:
+            self.engine.add_edges_from(edges)
+            self.stats['edges'] += len(edges)
+
+    def _fingerprint(self, collector, record):
+        payload = json.dumps(record, sort_keys=True, default=str)
+        return hashlib.sha1(f"{collector}:{payload}".encode('utf-8')).hexdigest()
@@ -1,37 +1,332 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-from pyvis.network import Network
 import json
 import os
+from collections import OrderedDict, deque
 from datetime import datetime
 
 class GraphEngine:
-    def __init__(self):
+    def __init__(self, query_cache_size=1024):
+        # networkx, matplotlib and pyvis are imported where first needed
+        import networkx as nx
+
         self.graph = nx.Graph()
         self.node_colors = {
             'domain': '#3498db',
             'ip': '#e74c3c', 
             'person': '#2ecc71',
             'organization': '#f39c12',
-            'service': '#9b59b6'
+            'service': '#9b59b6',
+            'certificate': '#1abc9c',
+            'bucket': '#e67e22',
+            'url': '#7f8c8d',
+            'threat': '#c0392b'
         }
 
+        # Indexes backing the pivot-query API
+        self._type_index = {}       # node type -> set of node ids
+        self._label_index = {}      # relationship -> {node id -> set of neighbour ids}
+        self._attribute_index = {}  # attribute -> {value -> set of node ids}
+        self._query_cache = OrderedDict()
+        self.query_cache_size = query_cache_size
+        # Bumped on every mutation so derived views (e.g. GraphAnalytics) can tell they are stale
+        self.version = 0
+
     def add_node(self, node_id, node_type, label=None, **kwargs):
         """Add a node to the graph"""
         if not label:
             label = node_id
-            
+
+        if node_id in self.graph:
+            self._unindex_node(node_id)
+
         self.graph.add_node(node_id, 
                           label=label,
                           type=node_type,
                           color=self.node_colors.get(node_type, '#95a5a6'),
                           **kwargs)
+        self._index_node(node_id)
+        self._invalidate_queries()
 
     def add_edge(self, source, target, relationship, **kwargs):
         """Add an edge between nodes"""
+        if self.graph.has_edge(source, target):
+            self._unindex_edge(source, target)
+
         self.graph.add_edge(source, target, 
                           label=relationship,
                           **kwargs)
+        self._index_edge(source, target)
+        self._invalidate_queries()
+
+    def add_nodes_from(self, nodes):
+        """Add many (node_id, node_type, attrs) nodes as one batch"""
+        pending = {}
+        for node_id, node_type, attrs in nodes:
+            data = pending.setdefault(node_id, {})
+            data.update(attrs)
+            data['type'] = node_type
+            data['color'] = self.node_colors.get(node_type, '#95a5a6')
+
+        for node_id, data in pending.items():
+            if not data.get('label'):
+                # Keep the label of a node that is only being re-referenced
+                existing = self.graph.nodes[node_id] if node_id in self.graph else {}
+                data['label'] = existing.get('label') or node_id
+
+        for node_id in pending:
+            if node_id in self.graph:
+                self._unindex_node(node_id)
+        self.graph.add_nodes_from(pending.items())
+        for node_id in pending:
+            self._index_node(node_id)
+        self._invalidate_queries()
+
+    def add_edges_from(self, edges):
+        """Add many (source, target, relationship, attrs) edges as one batch"""
+        pending = {}
+        for source, target, relationship, attrs in edges:
+            # Undirected graph: (a, b) and (b, a) are the same edge
+            key = (target, source) if (target, source) in pending else (source, target)
+            data = pending.setdefault(key, {})
+            data.update(attrs)
+            data['label'] = relationship
+
+        for source, target in pending:
+            if self.graph.has_edge(source, target):
+                self._unindex_edge(source, target)
+        self.graph.add_edges_from((s, t, data) for (s, t), data in pending.items())
+        for source, target in pending:
+            self._index_edge(source, target)
+        self._invalidate_queries()
+
+    def set_node_attributes(self, attribute, values):
+        """Set attribute on many nodes at once from a {node_id: value} mapping"""
+        for node_id, value in values.items():
+            if node_id in self.graph:
+                self.graph.nodes[node_id][attribute] = value
+        # Rebuilt lazily on the next nodes_sharing() query
+        self._attribute_index.pop(attribute, None)
+        self._invalidate_queries()
+
+    def neighbours(self, node_id, node_type=None, relationship=None):
+        """Return direct neighbours, optionally filtered by node type and relationship"""
+        key = ('neighbours', node_id, node_type, relationship)
+        return list(self._cached_query(key, lambda: tuple(
+            n for n in self._adjacent(node_id, relationship)
+            if self._has_type(n, node_type)
+        )))
+
+    def k_hop_neighbourhood(self, node_id, k=2, node_type=None, relationship=None):
+        """Return {node: hops} for every node within k hops of node_id.
+
+        relationship restricts which edges are followed, node_type only
+        filters the returned nodes so pivots can pass through other types.
+        """
+        def compute():
+            hops = {node_id: 0}
+            frontier = deque([node_id])
+            while frontier:
+                current = frontier.popleft()
+                if hops[current] >= k:
+                    continue
+                for neighbour in self._adjacent(current, relationship):
+                    if neighbour not in hops:
+                        hops[neighbour] = hops[current] + 1
+                        frontier.append(neighbour)
+            del hops[node_id]
+            return tuple((n, d) for n, d in hops.items() if self._has_type(n, node_type))
+
+        key = ('k_hop', node_id, k, node_type, relationship)
+        return dict(self._cached_query(key, compute))
+
+    def pivot_path(self, source, target, relationship=None, max_hops=None):
+        """Return the shortest pivot path between two entities, or None"""
+        key = ('pivot_path', source, target, relationship, max_hops)
+        path = self._cached_query(key, lambda: self._bidirectional_search(
+            source, target, relationship, max_hops))
+        return list(path) if path is not None else None
+
+    def nodes_sharing(self, attribute, value, node_type=None):
+        """Return nodes whose attribute equals (or contains) value"""
+        def compute():
+            index = self._attribute_values(attribute)
+            return tuple(n for n in index.get(value, ()) if self._has_type(n, node_type))
+
+        key = ('sharing', attribute, value, node_type)
+        return list(self._cached_query(key, compute))
+
+    def shared_attribute_pivots(self, node_id, attribute, node_type=None):
+        """Return {value: [other nodes]} for every value of attribute on node_id"""
+        def compute():
+            index = self._attribute_values(attribute)
+            pivots = []
+            for value in self._iter_values(self.graph.nodes[node_id].get(attribute)):
+                others = tuple(n for n in index.get(value, ())
+                               if n != node_id and self._has_type(n, node_type))
+                if others:
+                    pivots.append((value, others))
+            return tuple(pivots)
+
+        key = ('shared_pivots', node_id, attribute, node_type)
+        return {value: list(others) for value, others in self._cached_query(key, compute)}
+
+    def clear_query_cache(self):
+        """Drop all cached query results"""
+        self._query_cache.clear()
+
+    def rebuild_indexes(self):
+        """Rebuild query indexes after self.graph was modified directly"""
+        self._type_index = {}
+        self._label_index = {}
+        self._attribute_index = {}
+        for node in self.graph.nodes():
+            self._index_node(node)
+        for source, target in self.graph.edges():
+            self._index_edge(source, target)
+        self._invalidate_queries()
+
+    def _cached_query(self, key, compute):
+        """Return a cached query result, computing it on a miss"""
+        try:
+            result = self._query_cache[key]
+            self._query_cache.move_to_end(key)
+            return result
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable query arguments cannot be cached
+            return compute()
+
+        result = compute()
+        self._query_cache[key] = result
+        if len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+        return result
+
+    def _invalidate_queries(self):
+        self.version += 1
+        if self._query_cache:
+            self._query_cache.clear()
+
+    def _adjacent(self, node_id, relationship=None):
+        """Iterate neighbours of node_id, following only edges labelled relationship"""
+        if relationship is None:
+            if node_id in self.graph:
+                return iter(self.graph.adj[node_id])
+            return iter(())
+        return iter(self._label_index.get(relationship, {}).get(node_id, ()))
+
+    def _has_type(self, node_id, node_type):
+        return node_type is None or node_id in self._type_index.get(node_type, ())
+
+    def _bidirectional_search(self, source, target, relationship, max_hops):
+        """Breadth-first search from both ends, expanding the smaller frontier"""
+        if source not in self.graph or target not in self.graph:
+            return None
+        if source == target:
+            return (source,)
+
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+        hops = 0
+
+        while forward_frontier and backward_frontier:
+            if max_hops is not None and hops >= max_hops:
+                return None
+            hops += 1
+
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, others = forward_frontier, forward, backward
+            else:
+                frontier, parents, others = backward_frontier, backward, forward
+
+            next_frontier = []
+            for current in frontier:
+                for neighbour in self._adjacent(current, relationship):
+                    if neighbour in parents:
+                        continue
+                    parents[neighbour] = current
+                    if neighbour in others:
+                        return self._join_path(neighbour, forward, backward)
+                    next_frontier.append(neighbour)
+
+            if parents is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        return None
+
+    def _join_path(self, meeting, forward, backward):
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = forward[node]
+        path.reverse()
+        node = backward[meeting]
+        while node is not None:
+            path.append(node)
+            node = backward[node]
+        return tuple(path)
+
+    def _attribute_values(self, attribute):
+        """Return the value index for attribute, building it on first use"""
+        if attribute not in self._attribute_index:
+            index = {}
+            for node, value in self.graph.nodes(data=attribute):
+                for item in self._iter_values(value):
+                    index.setdefault(item, set()).add(node)
+            self._attribute_index[attribute] = index
+        return self._attribute_index[attribute]
+
+    def _iter_values(self, value):
+        """Yield the hashable values of an attribute (list items are indexed individually)"""
+        if value is None:
+            return
+        if isinstance(value, (list, tuple, set, frozenset)):
+            for item in value:
+                try:
+                    hash(item)
+                except TypeError:
+                    continue
+                yield item
+        else:
+            try:
+                hash(value)
+            except TypeError:
+                return
+            yield value
+
+    def _index_node(self, node_id):
+        data = self.graph.nodes[node_id]
+        self._type_index.setdefault(data.get('type'), set()).add(node_id)
+        for attribute, index in self._attribute_index.items():
+            for value in self._iter_values(data.get(attribute)):
+                index.setdefault(value, set()).add(node_id)
+
+    def _unindex_node(self, node_id):
+        data = self.graph.nodes[node_id]
+        self._type_index.get(data.get('type'), set()).discard(node_id)
+        for attribute, index in self._attribute_index.items():
+            for value in self._iter_values(data.get(attribute)):
+                index.get(value, set()).discard(node_id)
+
+    def _index_edge(self, source, target):
+        data = self.graph.edges[source, target]
+        adjacency = self._label_index.setdefault(data.get('label'), {})
+        adjacency.setdefault(source, set()).add(target)
+        adjacency.setdefault(target, set()).add(source)
+        # networkx creates untyped endpoints implicitly
+        for node in (source, target):
+            if 'type' not in self.graph.nodes[node]:
+                self._type_index.setdefault(None, set()).add(node)
+
+    def _unindex_edge(self, source, target):
+        adjacency = self._label_index.get(self.graph.edges[source, target].get('label'), {})
+        adjacency.get(source, set()).discard(target)
+        adjacency.get(target, set()).discard(source)
 
     def build_from_json(self, json_data):
         """Build graph from JSON data structure"""
@@ -51,8 +346,11 @@ class GraphEngine:
         except Exception as e:
             print(f"Error building graph: {str(e)}")
 
-    def visualize_matplotlib(self, filename=None):
-        """Generate visualization using matplotlib"""
+    def visualize_matplotlib(self, filename=None, dpi=300):
+        """Generate visualization using matplotlib (use a .svg filename for vector output)"""
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         plt.figure(figsize=(12, 8))
         
         # Get node colors
@@ -72,22 +370,29 @@ class GraphEngine:
         nx.draw_networkx_edge_labels(self.graph, pos, edge_labels=edge_labels)
         
         if filename:
-            plt.savefig(filename, dpi=300, bbox_inches='tight')
+            plt.savefig(filename, dpi=dpi, bbox_inches='tight')
             plt.close()
         else:
             plt.show()
 
     def visualize_pyvis(self, filename='graph.html'):
         """Generate interactive visualization using pyvis"""
+        from pyvis.network import Network
+
         net = Network(height='750px', width='100%', notebook=False)
         
         # Add nodes
         for node in self.graph.nodes():
+            extra = {}
+            # Scale nodes by centrality when GraphAnalytics has annotated them
+            if 'pagerank' in self.graph.nodes[node]:
+                extra['value'] = self.graph.nodes[node]['pagerank']
             net.add_node(node,
                        label=self.graph.nodes[node]['label'],
                        color=self.graph.nodes[node]['color'],
                        title=self.graph.nodes[node].get('title', ''),
-                       group=self.graph.nodes[node]['type'])
+                       group=self.graph.nodes[node]['type'],
+                       **extra)
         
         # Add edges
         for edge in self.graph.edges():
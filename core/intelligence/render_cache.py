@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+
+# Bump when the renderer changes in a way that invalidates cached output
+RENDER_CACHE_VERSION = 1
+
+
+class RenderCache:
+    """Content-addressed store of rendered report sections.
+
+    Entries are keyed by a hash of everything that affects the output
+    (section inputs, template source, renderer version), so an unchanged
+    section is reused as-is and stale entries are simply never looked up.
+    prune() evicts the least recently used entries once the cache grows
+    past max_bytes.
+    """
+
+    def __init__(self, cache_dir='.report_cache', max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Keys read or written since the last prune(); never evicted by it
+        self._used = set()
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def key(self, *parts):
+        """Return the content hash for a section's inputs"""
+        payload = json.dumps([RENDER_CACHE_VERSION, parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _paths(self, key, suffix):
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, key + suffix), os.path.join(directory, key + '.json')
+
+    def get(self, key, suffix='.pdf'):
+        """Return (path, metadata) for a cached section, or None"""
+        path, meta_path = self._paths(key, suffix)
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            self.misses += 1
+            return None
+        with open(meta_path, 'r') as f:
+            metadata = json.load(f)
+        # The metadata mtime records when an entry was last used
+        os.utime(meta_path)
+        self._used.add(key)
+        self.hits += 1
+        return path, metadata
+
+    def put(self, key, source_file, metadata=None, suffix='.pdf'):
+        """Move a freshly rendered file into the cache; returns its cached path"""
+        path, meta_path = self._paths(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(source_file, path)
+        # Metadata last: an entry only counts as present once both files exist
+        with open(meta_path, 'w') as f:
+            json.dump(metadata or {}, f)
+        self._used.add(key)
+        return path
+
+    def prune(self):
+        """Evict least recently used entries until the cache fits in max_bytes.
+
+        Entries used since the previous prune (i.e. by the build that just
+        finished) are kept. Returns the number of entries removed.
+        """
+        entries = {}
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entry = entries.setdefault(os.path.splitext(name)[0], [0, 0, []])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                entry[2].append(path)
+
+        total = sum(size for _, size, _ in entries.values())
+        removed = 0
+        for key, (_, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            if key in self._used:
+                continue
+            # Metadata first, so a half-removed entry already counts as missing
+            for path in sorted(paths, key=lambda p: not p.endswith('.json')):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        self._used.clear()
+        return removed
+
+    def clear(self):
+        """Remove every cached section"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir)
+        self._used.clear()
@@ -1,14 +1,41 @@
-from weasyprint import HTML
 from datetime import datetime
 import json
 import os
 import base64
-from jinja2 import Environment, FileSystemLoader
-import matplotlib.pyplot as plt
+import hashlib
+import pathlib
 import io
+import itertools
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from core.intelligence.findings_store import MemoryFindingsStore, finding_fingerprint, merge_finding
+
+GRAPH_MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'svg': 'image/svg+xml'
+}
+
+
+def _render_pdf_chunk(html_content, output_file, base_url=None):
+    """Render one report chunk to PDF in a worker process; returns its page count"""
+    from weasyprint import HTML
+
+    document = HTML(string=html_content, base_url=base_url).render()
+    document.write_pdf(output_file)
+    return len(document.pages)
+
 
 class ReportBuilder:
-    def __init__(self, template_dir='templates'):
+    def __init__(self, template_dir='templates', findings_store=None, render_cache=None,
+                 aggregate_findings=False, max_assets=1000):
+        # WeasyPrint and matplotlib are imported only by the methods that render
+        from jinja2 import Environment, FileSystemLoader
+
         self.template_env = Environment(
             loader=FileSystemLoader(template_dir),
             autoescape=True
@@ -19,49 +46,362 @@ class ReportBuilder:
             'findings': [],
             'graphs': []
         }
+        # JSONLFindingsStore / SQLiteFindingsStore keep large engagements on disk
+        if findings_store is None:
+            findings_store = MemoryFindingsStore(self.report_data['findings'])
+        if aggregate_findings and not findings_store.supports_aggregation:
+            raise ValueError(f"{type(findings_store).__name__} is append-only; "
+                             f"use SQLiteFindingsStore to aggregate findings")
+        self.findings = findings_store
+        # RenderCache reuses rendered sections whose inputs have not changed
+        self.render_cache = render_cache
+        self._template_hashes = {}
+        # Merge repeated issues into one finding with occurrence counts
+        self.aggregate_findings = aggregate_findings
+        self.max_assets = max_assets
 
-    def add_finding(self, title, description, evidence, severity='medium'):
+    def add_finding(self, title, description, evidence, severity='medium', asset=None):
         """Add a security finding to the report"""
-        self.report_data['findings'].append({
+        finding = {
             'title': title,
             'description': description,
             'evidence': evidence,
             'severity': severity.lower()
-        })
+        }
+        if not self.aggregate_findings:
+            if asset:
+                finding['asset'] = asset
+            self.findings.append(finding)
+            return
+
+        fingerprint = finding_fingerprint(title, description, evidence, asset)
+        existing = self.findings.get(fingerprint)
+        if existing is None:
+            finding['fingerprint'] = fingerprint
+            finding['occurrences'] = 1
+            finding['affected_assets'] = [asset] if asset else []
+            self.findings.put(fingerprint, finding)
+        else:
+            self.findings.put(fingerprint, merge_finding(existing, finding, asset, self.max_assets))
 
     def add_graph(self, graph_path, caption=None):
-        """Add a graph image to the report"""
+        """Add a graph image to the report
+
+        Graphs are stored by reference and deduplicated by content hash;
+        the image is only read again when a report is rendered.
+        """
         if not caption:
             caption = f"Graph generated on {datetime.now().strftime('%Y-%m-%d')}"
-            
-        # Convert graph to base64 for HTML embedding
+
+        digest = hashlib.sha256()
         with open(graph_path, 'rb') as f:
-            graph_data = base64.b64encode(f.read()).decode('utf-8')
-            
-        self.report_data['graphs'].append({
-            'data': graph_data,
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+
+        for graph in self.report_data['graphs']:
+            if graph.get('sha256') == sha256:
+                return graph
+
+        graph = {
+            'path': os.path.abspath(graph_path),
+            'sha256': sha256,
             'caption': caption,
             'format': os.path.splitext(graph_path)[1][1:].lower()
-        })
+        }
+        self.report_data['graphs'].append(graph)
+        return graph
 
-    def generate_pdf(self, output_file='report.pdf'):
-        """Generate PDF report from collected data"""
+    def _graph_sources(self, dpi=None):
+        """Resolve graphs to image URLs for the templates at render time"""
+        sources = []
+        for graph in self.report_data['graphs']:
+            if 'data' in graph:
+                # Reports saved before graphs were stored by reference
+                mime = GRAPH_MIME_TYPES.get(graph['format'], f"image/{graph['format']}")
+                src = f"data:{mime};base64,{graph['data']}"
+            else:
+                path = graph['path']
+                if dpi and graph['format'] in ('png', 'jpg', 'jpeg'):
+                    path = self._graph_thumbnail(graph, dpi)
+                src = pathlib.Path(path).as_uri()
+            sources.append({'src': src, 'caption': graph['caption'], 'sha256': graph.get('sha256')})
+        return sources
+
+    def _graph_thumbnail(self, graph, dpi):
+        """Downscale a raster graph to the target DPI, cached by content hash"""
+        thumb_dir = os.path.join(tempfile.gettempdir(), 'targettrace_graphs')
+        thumb_path = os.path.join(thumb_dir, f"{graph['sha256']}_{dpi}.{graph['format']}")
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        from PIL import Image
+        with Image.open(graph['path']) as image:
+            source_dpi = image.info.get('dpi', (300, 300))[0] or 300
+            scale = dpi / float(source_dpi)
+            if scale >= 1:
+                return graph['path']
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            os.makedirs(thumb_dir, exist_ok=True)
+            image.resize(size, Image.LANCZOS).save(thumb_path, dpi=(dpi, dpi))
+        return thumb_path
+
+    def _template_context(self, sort_by=None, graph_dpi=None):
+        """Template variables with findings streamed from the findings store"""
+        context = {k: v for k, v in self.report_data.items() if k != 'findings'}
+        context['findings'] = self.findings.sorted_by(sort_by) if sort_by else iter(self.findings)
+        context['graphs'] = self._graph_sources(graph_dpi)
+        return context
+
+    def generate_pdf(self, output_file='report.pdf', sort_by=None, workers=None,
+                     chunk_size=None, progress_callback=None, graph_dpi=None):
+        """Generate PDF report from collected data
+
+        Passing workers or chunk_size renders severity sections in batches
+        of chunk_size findings across a process pool and merges the parts.
+        The chunked path is also used whenever a render_cache is set, since
+        cached sections are what it reuses. graph_dpi downscales raster
+        graphs before they are embedded.
+        """
+        if workers or chunk_size or self.render_cache:
+            return self._generate_pdf_chunked(output_file, workers, chunk_size or 500,
+                                              progress_callback, graph_dpi)
         try:
-            # Render HTML template
+            # Render HTML template, pulling findings lazily from the store
             template = self.template_env.get_template('report_template.html')
-            html_content = template.render(**self.report_data)
+            html_content = ''.join(template.generate(**self._template_context(sort_by, graph_dpi)))
             
-            # Generate PDF
-            HTML(string=html_content).write_pdf(output_file)
+            # Generate PDF; graphs are loaded from disk by WeasyPrint
+            from weasyprint import HTML
+            HTML(string=html_content, base_url=self.template_env.loader.searchpath[0]).write_pdf(output_file)
             
             return output_file
         except Exception as e:
             print(f"Error generating report: {str(e)}")
             return None
 
-    def generate_graph_from_data(self, data, output_file='graph.png'):
-        """Generate a matplotlib graph from data"""
+    def _pdf_chunks(self, chunk_size, graph_dpi=None):
+        """Yield (heading, findings, graphs) batches, one heading per section"""
+        for severity, findings in self.findings.grouped_by('severity'):
+            heading = f"{str(severity).capitalize()} findings"
+            while True:
+                batch = list(itertools.islice(findings, chunk_size))
+                if not batch:
+                    break
+                yield heading, batch, []
+                heading = None
+
+        graphs = self._graph_sources(graph_dpi)
+        if graphs:
+            yield 'Graphs', [], graphs
+
+    def _generate_pdf_chunked(self, output_file, workers, chunk_size, progress_callback, graph_dpi=None):
+        """Render report chunks in parallel, then merge them behind a table of contents"""
+        try:
+            from pypdf import PdfReader, PdfWriter
+
+            section_template = self.template_env.get_template('report_section.html')
+            section_hash = self._template_hash('report_section.html')
+            base_url = self.template_env.loader.searchpath[0]
+            work_dir = tempfile.mkdtemp(prefix='targettrace_pdf_')
+            try:
+                toc = []
+                chunk_files = []
+                page_counts = {}
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {}
+                    for index, (heading, batch, graphs) in enumerate(self._pdf_chunks(chunk_size, graph_dpi)):
+                        if heading:
+                            toc.append({'title': heading, 'chunk': index, 'findings': 0})
+                        toc[-1]['findings'] += len(batch)
+
+                        # Unchanged chunks are reused without rendering or layout
+                        key = None
+                        if self.render_cache:
+                            key = self.render_cache.key('report_section.html', section_hash, base_url,
+                                                        self.report_data['title'], heading, batch, graphs)
+                            cached = self.render_cache.get(key)
+                            if cached:
+                                chunk_files.append(cached[0])
+                                page_counts[index] = cached[1]['pages']
+                                continue
+
+                        html_content = section_template.render(title=self.report_data['title'],
+                                                               heading=heading, findings=batch,
+                                                               graphs=graphs)
+                        chunk_file = os.path.join(work_dir, f"chunk_{index:06d}.pdf")
+                        chunk_files.append(chunk_file)
+                        futures[pool.submit(_render_pdf_chunk, html_content, chunk_file, base_url)] = (index, key)
+
+                    total = len(chunk_files)
+                    done = len(page_counts)
+                    if progress_callback and done:
+                        progress_callback(done, total)
+                    for future in as_completed(futures):
+                        index, key = futures[future]
+                        page_counts[index] = future.result()
+                        if key:
+                            chunk_files[index] = self.render_cache.put(key, chunk_files[index],
+                                                                       {'pages': page_counts[index]})
+                        done += 1
+                        if progress_callback:
+                            progress_callback(done, total)
+
+                toc_file = self._render_toc(toc, page_counts, work_dir)
+
+                # Merge the table of contents and chunks in order
+                writer = PdfWriter()
+                for page in PdfReader(toc_file).pages:
+                    writer.add_page(page)
+                chunk_starts = {}
+                for index, chunk_file in enumerate(chunk_files):
+                    chunk_starts[index] = len(writer.pages)
+                    for page in PdfReader(chunk_file).pages:
+                        writer.add_page(page)
+                for entry in toc:
+                    writer.add_outline_item(entry['title'], chunk_starts[entry['chunk']])
+
+                # Page numbers cannot be laid out per chunk, so stamp them on afterwards
+                numbers_file, _ = self._render_template_pdf('report_page_numbers.html', work_dir,
+                                                            pages=len(writer.pages))
+                for page, number_page in zip(writer.pages, PdfReader(numbers_file).pages):
+                    page.merge_page(number_page)
+
+                with open(output_file, 'wb') as f:
+                    writer.write(f)
+                if self.render_cache:
+                    # Drop sections older builds left behind once over the size cap
+                    self.render_cache.prune()
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            return output_file
+        except Exception as e:
+            print(f"Error generating report: {str(e)}")
+            return None
+
+    def _render_toc(self, toc, page_counts, work_dir):
+        """Render the cover and table of contents; returns the PDF path"""
+        toc_pages = 1
+        # Entry page numbers depend on the length of the contents itself
+        for _ in range(3):
+            page = toc_pages + 1
+            starts = {}
+            for index in sorted(page_counts):
+                starts[index] = page
+                page += page_counts[index]
+            for entry in toc:
+                entry['page'] = starts[entry['chunk']]
+
+            toc_file, pages = self._render_template_pdf('report_toc.html', work_dir, toc=toc,
+                                                        title=self.report_data['title'],
+                                                        date=self.report_data['date'])
+            if pages == toc_pages:
+                break
+            toc_pages = pages
+
+        return toc_file
+
+    def _render_template_pdf(self, template_name, work_dir, **context):
+        """Render a template straight to PDF, reusing a cached copy when inputs match"""
+        base_url = self.template_env.loader.searchpath[0]
+        key = None
+        if self.render_cache:
+            key = self.render_cache.key(template_name, self._template_hash(template_name),
+                                        base_url, context)
+            cached = self.render_cache.get(key)
+            if cached:
+                return cached[0], cached[1]['pages']
+
+        html_content = self.template_env.get_template(template_name).render(**context)
+        fd, output_file = tempfile.mkstemp(suffix='.pdf', dir=work_dir)
+        os.close(fd)
+        pages = _render_pdf_chunk(html_content, output_file, base_url)
+        if key:
+            output_file = self.render_cache.put(key, output_file, {'pages': pages})
+        return output_file, pages
+
+    def _template_hash(self, template_name):
+        """Hash of a template's source, so editing a template invalidates its cache entries"""
+        if template_name not in self._template_hashes:
+            source = self.template_env.loader.get_source(self.template_env, template_name)[0]
+            self._template_hashes[template_name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        return self._template_hashes[template_name]
+
+    def generate_html(self, output_file='report.html', page_size=50, graph_dpi=None):
+        """Generate a standalone paginated HTML report without WeasyPrint
+
+        Findings are written in pages of page_size to a sibling assets
+        directory and loaded by the browser on demand, so the HTML page
+        stays the same size however many findings there are.
+        """
         try:
+            assets_dir = f"{os.path.splitext(output_file)[0]}_files"
+            if not os.path.exists(assets_dir):
+                os.makedirs(assets_dir)
+            assets_name = os.path.basename(assets_dir)
+
+            sections = []
+            total = 0
+            for section, (severity, findings) in enumerate(self.findings.grouped_by('severity')):
+                count = 0
+                chunks = 0
+                while True:
+                    batch = list(itertools.islice(findings, page_size))
+                    if not batch:
+                        break
+                    chunk_file = os.path.join(assets_dir, f"findings_{section}_{chunks}.js")
+                    with open(chunk_file, 'w') as f:
+                        f.write('TargetTrace.loadChunk(')
+                        json.dump({'section': section, 'index': chunks, 'findings': batch}, f)
+                        f.write(');\n')
+                    count += len(batch)
+                    chunks += 1
+                sections.append({'severity': severity, 'count': count, 'chunks': chunks})
+                total += count
+
+            graphs = []
+            for graph in self._graph_sources(graph_dpi):
+                graphs.append({
+                    'src': f"{assets_name}/{self._copy_graph_asset(graph, assets_dir)}",
+                    'caption': graph['caption']
+                })
+
+            manifest = {'assets': assets_name, 'sections': sections, 'max_cached': 20}
+            template = self.template_env.get_template('report_html.html')
+            with open(output_file, 'w') as f:
+                f.write(template.render(title=self.report_data['title'], date=self.report_data['date'],
+                                        total=total, manifest=manifest, graphs=graphs))
+
+            return output_file
+        except Exception as e:
+            print(f"Error generating HTML report: {str(e)}")
+            return None
+
+    def _copy_graph_asset(self, graph, assets_dir):
+        """Place a graph image in the HTML assets directory; returns its file name"""
+        if graph['src'].startswith('data:'):
+            header, data = graph['src'].split(',', 1)
+            extension = {v: k for k, v in GRAPH_MIME_TYPES.items()}.get(header[5:-7], 'png')
+            name = f"{hashlib.sha256(data.encode('utf-8')).hexdigest()}.{extension}"
+            target = os.path.join(assets_dir, name)
+            if not os.path.exists(target):
+                with open(target, 'wb') as f:
+                    f.write(base64.b64decode(data))
+            return name
+
+        source = url2pathname(urlparse(graph['src']).path)
+        name = f"{graph['sha256']}{os.path.splitext(source)[1]}"
+        target = os.path.join(assets_dir, name)
+        if not os.path.exists(target):
+            shutil.copyfile(source, target)
+        return name
+
+    def generate_graph_from_data(self, data, output_file='graph.png', dpi=300):
+        """Generate a matplotlib graph from data (use a .svg output_file for vector output)"""
+        try:
+            import matplotlib.pyplot as plt
+
             # Parse data if it's JSON string
             if isinstance(data, str):
                 data = json.loads(data)
@@ -77,7 +417,7 @@ class ReportBuilder:
             plt.tight_layout()
             
             # Save to file
-            plt.savefig(output_file, dpi=300)
+            plt.savefig(output_file, dpi=dpi)
             plt.close()
             
             return output_file
@@ -89,7 +429,16 @@ class ReportBuilder:
         """Save report data as JSON file"""
         try:
             with open(output_file, 'w') as f:
-                json.dump(self.report_data, f, indent=4)
+                # Stream findings one per line instead of building one big document
+                f.write('{\n')
+                for key, value in self.report_data.items():
+                    if key != 'findings':
+                        f.write(f"    {json.dumps(key)}: {json.dumps(value)},\n")
+                f.write('    "findings": [')
+                for i, finding in enumerate(self.findings):
+                    f.write(',\n        ' if i else '\n        ')
+                    f.write(json.dumps(finding))
+                f.write('\n    ]\n}\n')
             return output_file
         except Exception as e:
             print(f"Error saving JSON report: {str(e)}")
@@ -99,7 +448,21 @@ class ReportBuilder:
         """Load report data from JSON file"""
         try:
             with open(json_file, 'r') as f:
-                self.report_data = json.load(f)
+                report_data = json.load(f)
+
+            findings = report_data.get('findings', [])
+            if isinstance(self.findings, MemoryFindingsStore):
+                self.findings = MemoryFindingsStore(findings)
+            else:
+                self.findings.clear()
+                for finding in findings:
+                    # Keep aggregated findings addressable for later merges
+                    if finding.get('fingerprint') and self.findings.supports_aggregation:
+                        self.findings.put(finding['fingerprint'], finding)
+                    else:
+                        self.findings.append(finding)
+                report_data['findings'] = []
+            self.report_data = report_data
             return True
         except Exception as e:
             print(f"Error loading JSON report: {str(e)}")
@@ -1,12 +1,10 @@
-import whois
 import dns.resolver
 from datetime import datetime
 import socket
 import ssl
 import json
 from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
+from core.http_fetch import fetch
 
 class DomainTracer:
     def __init__(self, domain):
@@ -21,6 +19,8 @@ class DomainTracer:
 
     def run_whois(self):
         try:
+            import whois
+
             w = whois.whois(self.domain)
             self.results['whois'] = {
                 'registrar': w.registrar,
@@ -64,10 +64,14 @@ class DomainTracer:
 
     def get_web_tech(self):
         try:
+            from bs4 import BeautifulSoup
+
             headers = {'User-Agent': 'Mozilla/5.0'}
-            r = requests.get(f"https://{self.domain}", headers=headers, timeout=10)
+            r = fetch(f"https://{self.domain}", headers=headers, timeout=10)
             self.results['web']['headers'] = dict(r.headers)
             self.results['web']['status_code'] = r.status_code
+            if r.truncated:
+                self.results['web']['truncated'] = r.reason
             
             soup = BeautifulSoup(r.text, 'html.parser')
             meta = soup.find_all('meta')
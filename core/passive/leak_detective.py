@@ -1,4 +1,3 @@
-import requests
 import re
 import json
 from datetime import datetime
@@ -6,10 +5,13 @@ import os
 import hashlib
 from urllib.parse import urlparse
 import dns.resolver
+from core.active.bucket_probe import BucketProbe
 
 class LeakDetective:
-    def __init__(self, domain):
+    def __init__(self, domain, bucket_cache=None):
         self.domain = domain
+        # Optional BucketProbeCache shared with BucketScanner
+        self.bucket_cache = bucket_cache
         self.results = {
             'domain': domain,
             'github_leaks': [],
@@ -66,7 +68,7 @@ class LeakDetective:
             if self.domain.lower() in paste['content'].lower():
                 self.results['pastebin_leaks'].append(paste)
 
-    def find_s3_buckets(self):
+    def find_s3_buckets(self, force_refresh=False):
         """Find potentially open S3 buckets"""
         common_buckets = [
             f"{self.domain}-assets",
@@ -76,24 +78,17 @@ class LeakDetective:
             f"prod-{self.domain}"
         ]
 
-        for bucket in common_buckets:
-            try:
-                url = f"http://{bucket}.s3.amazonaws.com"
-                r = requests.head(url, timeout=5)
-                if r.status_code == 200:
-                    self.results['s3_buckets'].append({
-                        'bucket': bucket,
-                        'url': url,
-                        'status': 'public'
-                    })
-                elif r.status_code == 403:
-                    self.results['s3_buckets'].append({
-                        'bucket': bucket,
-                        'url': url,
-                        'status': 'exists_but_private'
-                    })
-            except:
-                continue
+        # One pooled anonymous probe pass instead of a HEAD per bucket
+        statuses = {'public': 'public', 'private': 'exists_but_private'}
+        probe = BucketProbe(timeout=5, cache=self.bucket_cache)
+        for probe_result in probe.probe(common_buckets, force_refresh):
+            if probe_result['status'] in statuses:
+                self.results['s3_buckets'].append({
+                    'bucket': probe_result['bucket'],
+                    'url': f"http://{probe_result['bucket']}.s3.amazonaws.com",
+                    'status': statuses[probe_result['status']],
+                    'region': probe_result['region']
+                })
 
     def extract_sensitive_data(self, text):
         """Extract potential API keys and credentials from text"""
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Token-bucket rate limiter usable from threads and coroutines.
+
+    rate tokens are added per second up to capacity (the allowed burst,
+    defaulting to one second's worth). pause() holds every caller back
+    until a quota window resets.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Take tokens now, returning how long to wait before they are valid"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+            return max(wait, self.paused_until - now)
+
+    def pause(self, seconds):
+        """Block all acquires for the next seconds"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def paused_for(self):
+        return max(self.paused_until - time.monotonic(), 0)
+
+    def set_rate(self, rate):
+        """Change the refill rate, keeping tokens already accrued"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = float(rate)
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available"""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Wait without blocking the event loop until tokens are available"""
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
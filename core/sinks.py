@@ -0,0 +1,63 @@
+import json
+
+
+class JSONLSink:
+    """Write records as JSON lines to a file path or an open file object.
+
+    Paths are truncated by default so each scan writes one complete
+    listing; pass mode='a' to accumulate across runs deliberately.
+    """
+
+    def __init__(self, target, mode='w'):
+        if hasattr(target, 'write'):
+            self.file = target
+            self._owns_file = False
+        else:
+            self.file = open(target, mode, encoding='utf-8')
+            self._owns_file = True
+        self.count = 0
+
+    def write(self, record):
+        self.file.write(json.dumps(record, default=str) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def collect(results, key, items, sink=None, error=None):
+    """Gather items into results[key], or stream them to a JSONL sink.
+
+    sink may be a file path or a JSONLSink; with a sink nothing is kept in
+    memory and the number of items written is returned. If the items fail
+    partway, the error is added to results['errors'] (prefixed with error)
+    and whatever was already gathered is returned.
+    """
+    collected = []
+    writer = None
+    if sink is not None:
+        writer = JSONLSink(sink) if isinstance(sink, str) else sink
+    written = 0
+    try:
+        for item in items:
+            if writer is None:
+                collected.append(item)
+                results[key].append(item)
+            else:
+                writer.write(item)
+                written += 1
+    except Exception as e:
+        results['errors'].append(f"{error}: {str(e)}")
+    finally:
+        if writer is not None and writer is not sink:
+            writer.close()
+    return collected if writer is None else written
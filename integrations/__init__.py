@@ -1 +1,32 @@
 # External service integrations package
+import importlib
+
+# Client classes, imported on first attribute access so that using one
+# integration does not import every other provider's SDK
+COLLECTORS = {
+    'CensysClient': 'integrations.censys_client',
+    'GitHubScanner': 'integrations.github_scanner',
+    'OTXClient': 'integrations.otx_client',
+    'SecurityTrailsClient': 'integrations.securitytrails_client',
+    'ShodanClient': 'integrations.shodan_client',
+    'WaybackConnector': 'integrations.wayback_connector'
+}
+
+__all__ = list(COLLECTORS)
+
+
+def load_collector(name):
+    """Import and return a client class by name"""
+    if name not in COLLECTORS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    cls = getattr(importlib.import_module(COLLECTORS[name]), name)
+    globals()[name] = cls
+    return cls
+
+
+def __getattr__(name):
+    return load_collector(name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(COLLECTORS))
@@ -1,15 +1,15 @@
-import censys.search
-import censys.certificates
-import censys.ipv4
 import json
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from integrations.response_cache import cached_call
 
 class CensysClient:
-    def __init__(self, api_id=None, api_secret=None):
+    def __init__(self, api_id=None, api_secret=None, cache=None):
         self.api_id = api_id
         self.api_secret = api_secret
+        # Optional ResponseCache for host lookups
+        self.cache = cache
         self.results = {
             'hosts': [],
             'certificates': [],
@@ -18,6 +18,11 @@ class CensysClient:
         }
         
         if api_id and api_secret:
+            # The Censys SDK is only loaded for configured clients
+            import censys.search
+            import censys.certificates
+            import censys.ipv4
+
             self.certificates = censys.certificates.CensysCertificates(api_id, api_secret)
             self.ipv4 = censys.ipv4.CensysIPv4(api_id, api_secret)
             self.search = censys.search.CensysSearch(api_id, api_secret)
@@ -88,10 +93,12 @@ class CensysClient:
     def get_host(self, ip):
         """Get host details by IP"""
         try:
-            if not self.api_id or not self.api_secret:
-                raise ValueError("Censys API credentials not configured")
-            
-            host = self.ipv4.view(ip)
+            def lookup():
+                if not self.api_id or not self.api_secret:
+                    raise ValueError("Censys API credentials not configured")
+                return self.ipv4.view(ip)
+
+            host = cached_call(self.cache, 'censys', 'host', {'ip': ip}, lookup)
             self.results['hosts'].append(host)
             return host
         except Exception as e:
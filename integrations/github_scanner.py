@@ -1,13 +1,59 @@
-import requests
 import base64
 import json
 import os
 import re
+import tarfile
 from datetime import datetime
 from urllib.parse import urlparse
+from core.sinks import collect
+from integrations.http_client import HTTPClient, provider_limiter
+from integrations.response_cache import ResponseCache
+
+SENSITIVE_PATTERNS = {
+    'aws_keys': re.compile(r'(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])'),
+    'aws_secrets': re.compile(r'(?<![A-Za-z0-9/+=])[A-Za-z0-9/+=]{40}(?![A-Za-z0-9/+=])'),
+    'api_keys': re.compile(r'(?i)(api|key|token|secret)[_-]?key[=:]\s*([a-z0-9]{32,})'),
+    'database_urls': re.compile(r'(?i)(postgres|mysql|mongodb)://[a-z0-9_-]+:[^@\s]+@[a-z0-9.-]+'),
+    'config_files': re.compile(r'(\.env|config\.json|settings\.py|credentials)')
+}
+
+# Third-party and generated code skipped by archive scans
+VENDORED_PATHS = re.compile(
+    r'(^|/)(node_modules|vendor|third_party|bower_components|site-packages|dist|build|\.git)/'
+    r'|\.min\.(js|css)$'
+)
+
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.svgz', '.pdf',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.war',
+    '.exe', '.dll', '.so', '.dylib', '.a', '.o', '.class', '.pyc', '.whl',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4', '.mov', '.avi',
+    '.psd', '.bin', '.dat', '.db', '.sqlite'
+}
+
+# Listings kept in results (no sink given) stop here unless max_items says otherwise
+MAX_COLLECTED_ITEMS = 1000
+
+
+def scan_text(text):
+    """Return {pattern name: matches} for every sensitive pattern found in text"""
+    found = {}
+    for pattern_name, pattern in SENSITIVE_PATTERNS.items():
+        matches = pattern.findall(text)
+        if matches:
+            found[pattern_name] = matches
+    return found
+
+
+def is_scannable_path(path):
+    """False for vendored directories and binary file types"""
+    if VENDORED_PATHS.search(path):
+        return False
+    return os.path.splitext(path)[1].lower() not in BINARY_EXTENSIONS
+
 
 class GitHubScanner:
-    def __init__(self, api_token=None):
+    def __init__(self, api_token=None, cache=None):
         self.api_token = api_token
         self.base_url = "https://api.github.com"
         self.headers = {
@@ -16,6 +62,14 @@ class GitHubScanner:
         if api_token:
             self.headers["Authorization"] = f"token {api_token}"
         
+        # Every GET is revalidated with its ETag/Last-Modified once the cache
+        # entry expires; 304s do not count against the hourly quota. Without
+        # a persistent cache the validators only live for this scanner.
+        if cache is None:
+            cache = ResponseCache(':memory:', ttls=[('github:*', 0)], max_bytes=64 * 1024 * 1024)
+        self.http = HTTPClient('github', cache=cache, conditional=True, primary_resource='core')
+        self.search_limiter = provider_limiter('github_search')
+        self.code_search_limiter = provider_limiter('github_code_search')
         self.results = {
             'repositories': [],
             'commits': [],
@@ -23,54 +77,80 @@ class GitHubScanner:
             'errors': []
         }
 
-    def search_repositories(self, query, sort='updated', order='desc'):
-        """Search GitHub repositories"""
-        try:
-            params = {
-                'q': query,
-                'sort': sort,
-                'order': order
-            }
-            response = requests.get(
-                f"{self.base_url}/search/repositories",
-                headers=self.headers,
-                params=params
-            )
+    def _paginate(self, url, params=None, items_key=None, max_items=None, limiter=None):
+        """Yield items from every page, following Link headers 100 at a time"""
+        params = dict(params or {}, per_page=100)
+        count = 0
+        while url:
+            response = self.http.get(url, headers=self.headers, params=params, limiter=limiter)
             response.raise_for_status()
-            
-            results = response.json()
-            self.results['repositories'].extend(results.get('items', []))
-            return results.get('items', [])
-        except Exception as e:
-            self.results['errors'].append(f"Repository search error: {str(e)}")
-            return []
 
-    def search_code(self, query, sort='indexed', order='desc'):
-        """Search code on GitHub"""
-        try:
-            params = {
-                'q': query,
-                'sort': sort,
-                'order': order
-            }
-            response = requests.get(
-                f"{self.base_url}/search/code",
-                headers=self.headers,
-                params=params
-            )
-            response.raise_for_status()
-            
-            results = response.json()
-            self.results['code_search'].extend(results.get('items', []))
-            return results.get('items', [])
-        except Exception as e:
-            self.results['errors'].append(f"Code search error: {str(e)}")
-            return []
+            data = response.json()
+            for item in (data.get(items_key, []) if items_key else data):
+                yield item
+                count += 1
+                if max_items and count >= max_items:
+                    return
+            # The next link already carries the query string
+            url = response.links.get('next', {}).get('url')
+            params = None
+
+    @staticmethod
+    def _cap(max_items, sink):
+        """Without a sink, listings are capped so results stays bounded"""
+        if max_items is None and sink is None:
+            return MAX_COLLECTED_ITEMS
+        return max_items
+
+    def iter_search_repositories(self, query, sort='updated', order='desc', max_items=None):
+        """Lazily yield repositories matching query (the API stops at 1000)"""
+        params = {
+            'q': query,
+            'sort': sort,
+            'order': order
+        }
+        return self._paginate(f"{self.base_url}/search/repositories", params, 'items',
+                              max_items, self.search_limiter)
+
+    def iter_search_code(self, query, sort='indexed', order='desc', max_items=None):
+        """Lazily yield code search hits (the API stops at 1000)"""
+        params = {
+            'q': query,
+            'sort': sort,
+            'order': order
+        }
+        return self._paginate(f"{self.base_url}/search/code", params, 'items',
+                              max_items, self.code_search_limiter)
+
+    def iter_commits(self, owner, repo, path='', since=None, max_items=None, sha=None):
+        """Lazily yield commits for a repository or path, newest first
+
+        sha starts the walk at that commit instead of the default branch head.
+        """
+        params = {}
+        if sha:
+            params['sha'] = sha
+        if path:
+            params['path'] = path
+        if since:
+            params['since'] = since.isoformat()
+        return self._paginate(f"{self.base_url}/repos/{owner}/{repo}/commits", params,
+                              max_items=max_items)
+
+    def search_repositories(self, query, sort='updated', order='desc', max_items=None, sink=None):
+        """Search GitHub repositories (at most MAX_COLLECTED_ITEMS without a sink)"""
+        items = self.iter_search_repositories(query, sort, order, self._cap(max_items, sink))
+        return collect(self.results, 'repositories', items, sink, 'Repository search error')
+
+    def search_code(self, query, sort='indexed', order='desc', max_items=None, sink=None):
+        """Search code on GitHub (at most MAX_COLLECTED_ITEMS without a sink)"""
+        items = self.iter_search_code(query, sort, order, self._cap(max_items, sink))
+        return collect(self.results, 'code_search', items, sink, 'Code search error')
 
     def get_repository_content(self, owner, repo, path=''):
         """Get contents of a repository path"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/repos/{owner}/{repo}/contents/{path}",
                 headers=self.headers
             )
@@ -85,39 +165,21 @@ class GitHubScanner:
             self.results['errors'].append(f"Content fetch error: {str(e)}")
             return None
 
-    def get_commit_history(self, owner, repo, path='', since=None):
-        """Get commit history for a repository or path"""
-        try:
-            params = {}
-            if path:
-                params['path'] = path
-            if since:
-                params['since'] = since.isoformat()
-                
-            response = requests.get(
-                f"{self.base_url}/repos/{owner}/{repo}/commits",
-                headers=self.headers,
-                params=params
-            )
-            response.raise_for_status()
-            
-            commits = response.json()
-            self.results['commits'].extend(commits)
-            return commits
-        except Exception as e:
-            self.results['errors'].append(f"Commit history error: {str(e)}")
-            return []
-
-    def find_sensitive_data(self, owner, repo):
-        """Search for potentially sensitive data in a repository"""
-        sensitive_patterns = {
-            'aws_keys': r'(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])',
-            'aws_secrets': r'(?<![A-Za-z0-9/+=])[A-Za-z0-9/+=]{40}(?![A-Za-z0-9/+=])',
-            'api_keys': r'(?i)(api|key|token|secret)[_-]?key[=:]\s*([a-z0-9]{32,})',
-            'database_urls': r'(?i)(postgres|mysql|mongodb)://[a-z0-9_-]+:[^@\s]+@[a-z0-9.-]+',
-            'config_files': r'(\.env|config\.json|settings\.py|credentials)'
-        }
-        
+    def get_commit_history(self, owner, repo, path='', since=None, max_items=None, sink=None):
+        """Get commit history for a repository or path (at most MAX_COLLECTED_ITEMS without a sink)"""
+        items = self.iter_commits(owner, repo, path, since, self._cap(max_items, sink))
+        return collect(self.results, 'commits', items, sink, 'Commit history error')
+
+    def find_sensitive_data(self, owner, repo, mode='search', ref=None):
+        """Search for potentially sensitive data in a repository
+
+        mode='search' fetches each code search hit through the contents
+        API; mode='archive' downloads the repository tarball once and
+        scans every file in it (see scan_repository_archive).
+        """
+        if mode == 'archive':
+            return self.scan_repository_archive(owner, repo, ref)
+
         findings = []
         try:
             # Search repository code
@@ -127,21 +189,132 @@ class GitHubScanner:
                                                     item['repository']['name'], 
                                                     item['path'])
                 if content and 'decoded_content' in content:
-                    text = content['decoded_content']
-                    for pattern_name, pattern in sensitive_patterns.items():
-                        matches = re.findall(pattern, text)
-                        if matches:
+                    for pattern_name, matches in scan_text(content['decoded_content']).items():
+                        findings.append({
+                            'file': item['path'],
+                            'pattern': pattern_name,
+                            'matches': matches,
+                            'html_url': item['html_url']
+                        })
+        except Exception as e:
+            self.results['errors'].append(f"Sensitive data scan error: {str(e)}")
+        
+        return findings
+
+    def scan_repository_archive(self, owner, repo, ref=None, max_file_bytes=1024 * 1024):
+        """Stream the repository tarball once and scan every text file in it.
+
+        One API request covers the whole tree instead of one per file, and
+        files code search never indexed are included. Vendored paths,
+        binary files and files over max_file_bytes are skipped.
+        """
+        findings = []
+        url = f"{self.base_url}/repos/{owner}/{repo}/tarball"
+        if ref:
+            url += f"/{ref}"
+        try:
+            with self.http.get(url, headers=self.headers, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+                    for member in archive:
+                        # Members are prefixed with an <owner>-<repo>-<sha>/ directory
+                        path = member.name.split('/', 1)[-1]
+                        if not member.isfile() or member.size > max_file_bytes or not is_scannable_path(path):
+                            continue
+                        data = archive.extractfile(member).read()
+                        if b'\0' in data[:8192]:
+                            continue
+                        for pattern_name, matches in scan_text(data.decode('utf-8', errors='replace')).items():
                             findings.append({
-                                'file': item['path'],
+                                'file': path,
                                 'pattern': pattern_name,
                                 'matches': matches,
-                                'html_url': item['html_url']
+                                'html_url': f"https://github.com/{owner}/{repo}/blob/{ref or 'HEAD'}/{path}"
                             })
         except Exception as e:
-            self.results['errors'].append(f"Sensitive data scan error: {str(e)}")
-        
+            self.results['errors'].append(f"Archive scan error: {str(e)}")
+
+        return findings
+
+    def scan_commit_history(self, owner, repo, state_file=None, max_commits=None):
+        """Scan lines added by each commit newer than the last scanned SHA.
+
+        state_file (JSON) remembers the newest scanned commit per repository
+        so scheduled runs only fetch commits they have not seen. Without a
+        state entry, the whole history is scanned. When max_commits (or an
+        error) stops a run early, the entry records a resume cursor instead:
+        the old checkpoint, the head the walk started from and the oldest
+        commit scanned so far. The next run continues below that cursor and
+        only advances the checkpoint to the saved head once it reaches the
+        old checkpoint or the start of history.
+        """
+        key = f"{owner}/{repo}"
+        state = {}
+        if state_file and os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+        entry = state.get(key)
+        if isinstance(entry, dict):
+            last_sha, newest, resume = entry.get('checkpoint'), entry['head'], entry['resume']
+        else:
+            last_sha, newest, resume = entry, None, None
+
+        findings = []
+        oldest = None
+        scanned = 0
+        complete = True
+        try:
+            for commit in self.iter_commits(owner, repo, sha=resume):
+                if commit['sha'] == resume:
+                    # Already scanned by the run that saved the cursor
+                    continue
+                if commit['sha'] == last_sha:
+                    break
+                if max_commits and scanned >= max_commits:
+                    complete = False
+                    break
+
+                response = self.http.get(f"{self.base_url}/repos/{owner}/{repo}/commits/{commit['sha']}",
+                                         headers=self.headers)
+                response.raise_for_status()
+                for changed in response.json().get('files', []):
+                    if not is_scannable_path(changed['filename']) or not changed.get('patch'):
+                        continue
+                    added = '\n'.join(line[1:] for line in changed['patch'].splitlines()
+                                      if line.startswith('+') and not line.startswith('+++'))
+                    for pattern_name, matches in scan_text(added).items():
+                        findings.append({
+                            'commit': commit['sha'],
+                            'file': changed['filename'],
+                            'pattern': pattern_name,
+                            'matches': matches,
+                            'html_url': commit.get('html_url')
+                        })
+                newest = newest or commit['sha']
+                oldest = commit['sha']
+                scanned += 1
+        except Exception as e:
+            self.results['errors'].append(f"Commit history scan error: {str(e)}")
+            complete = False
+
+        if not state_file or not newest:
+            return findings
+        if complete:
+            state[key] = newest
+        elif oldest:
+            state[key] = {'checkpoint': last_sha, 'head': newest, 'resume': oldest}
+        else:
+            # Nothing scanned this run; keep the existing entry
+            return findings
+        with open(state_file, 'w') as f:
+            json.dump(state, f, indent=4)
         return findings
 
+    def rate_limit_budget(self):
+        """Remaining GitHub quota per resource, pacing state and request counters"""
+        return self.http.budget()
+
     def to_json(self):
         """Return results as JSON"""
         return json.dumps(self.results, indent=4)
@@ -0,0 +1,273 @@
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from core.rate_limit import TokenBucket
+from integrations.response_cache import CacheMiss
+
+# Provider -> (requests per second, burst); conservative defaults under each
+# API's documented limits, tightened at runtime from rate-limit headers
+PROVIDER_LIMITS = {
+    'github': (1.0, 10),
+    # Search has its own, much lower limits (30/min, code search 10/min)
+    'github_search': (0.5, 5),
+    'github_code_search': (1 / 6, 2),
+    'securitytrails': (1.0, 5),
+    'otx': (2.0, 10),
+    'wayback': (0.5, 5),
+    'default': (5.0, 10)
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_TIMEOUT = (5, 30)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_limiter(provider):
+    """Token bucket shared by every client of one provider in this process"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate, burst = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS['default'])
+            _limiters[provider] = TokenBucket(rate, burst)
+        return _limiters[provider]
+
+
+class HTTPClient:
+    """Pooled requests session with rate limiting, retries and default timeouts.
+
+    Requests wait on the provider's shared token bucket. 429 and 5xx
+    responses and connection errors are retried with jittered exponential
+    backoff, honouring Retry-After. X-RateLimit-Remaining/Reset (or the
+    RateLimit-* equivalents) slow the bucket down to what is left of the
+    window and pause until the reset once it is exhausted. With a
+    ResponseCache, successful GETs are served from and stored in it; with
+    conditional=True expired entries are revalidated with If-None-Match /
+    If-Modified-Since instead of refetched, and a 304 renews them.
+    primary_resource names the X-RateLimit-Resource that paces the shared
+    bucket; budgets for other resources are only recorded.
+    """
+
+    def __init__(self, provider, headers=None, max_retries=4, backoff=1.0, max_backoff=60,
+                 max_wait=300, timeout=DEFAULT_TIMEOUT, pool_size=10, cache=None,
+                 conditional=False, primary_resource=None):
+        import requests
+
+        self.provider = provider
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Longest pause accepted for an exhausted quota before giving up
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.cache = cache
+        self.conditional = conditional
+        self.primary_resource = primary_resource
+        self.limiter = provider_limiter(provider)
+        # The configured rate, not the shared bucket's current (maybe throttled) one
+        self.default_rate = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS['default'])[0]
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.stats = {'requests': 0, 'retries': 0, 'waited': 0.0, 'cache_hits': 0, 'not_modified': 0}
+        # X-RateLimit-Resource (or 'default') -> last reported quota
+        self.budgets = {}
+
+    def get(self, url, limiter=None, **kwargs):
+        """GET through the cache; limiter is only acquired for network requests"""
+        if self.cache is None:
+            return self.request('GET', url, limiter=limiter, **kwargs)
+
+        endpoint, params = self._cache_key(url, kwargs.get('params'))
+        cached = self.cache.get(self.provider, endpoint, params, allow_stale=self.conditional)
+        if cached is not None and not cached['stale']:
+            self.stats['cache_hits'] += 1
+            return self._cached_response(url, cached)
+        if self.cache.offline:
+            raise CacheMiss(f"No cached {self.provider} response for {url}")
+
+        if cached is not None:
+            validators = self._cached_response(url, cached).headers
+            headers = dict(kwargs.pop('headers', None) or {})
+            if validators.get('ETag'):
+                headers['If-None-Match'] = validators['ETag']
+            if validators.get('Last-Modified'):
+                headers['If-Modified-Since'] = validators['Last-Modified']
+            kwargs['headers'] = headers
+
+        response = self.request('GET', url, limiter=limiter, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.stats['not_modified'] += 1
+            self.cache.touch(self.provider, endpoint, params)
+            return self._cached_response(url, cached)
+        if response.status_code == 200 and not kwargs.get('stream'):
+            self.cache.put(self.provider, endpoint, params, response.content,
+                           response.status_code, response.headers)
+        return response
+
+    def _cache_key(self, url, params):
+        """Endpoint path (matched against cache TTLs) and merged query parameters"""
+        parts = urlsplit(url)
+        merged = dict(p.split('=', 1) if '=' in p else (p, '') for p in parts.query.split('&') if p)
+        merged.update({k: str(v) for k, v in (params or {}).items()})
+        merged['_host'] = parts.netloc
+        return urlunsplit(('', '', parts.path, '', '')), merged
+
+    def _cached_response(self, url, cached):
+        import requests
+
+        response = requests.Response()
+        response.status_code = cached['status']
+        response.headers = requests.structures.CaseInsensitiveDict(cached['headers'])
+        response._content = cached['body']
+        response._content_consumed = True
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def request(self, method, url, limiter=None, **kwargs):
+        """Send a request, retrying throttled and failed attempts
+
+        limiter is an extra TokenBucket (e.g. an endpoint-specific limit)
+        acquired before every attempt alongside the provider's own.
+        """
+        import requests
+
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            self._wait_for_quota(limiter)
+            self.stats['requests'] += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                self.stats['retries'] += 1
+                self._sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            self._update_limits(response)
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+            response.close()
+            self._sleep(delay)
+            attempt += 1
+
+    def _wait_for_quota(self, limiter=None):
+        started = time.monotonic()
+        if limiter is not None:
+            limiter.acquire()
+        self.limiter.acquire()
+        self.stats['waited'] += time.monotonic() - started
+
+    def _sleep(self, seconds):
+        self.stats['waited'] += seconds
+        time.sleep(seconds)
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying, or None to return the response"""
+        if attempt >= self.max_retries:
+            return None
+        # A 403 is a rate limit when the quota is spent or (GitHub secondary
+        # limits) when the server asks us to retry later
+        exhausted = response.status_code == 403 and (
+            self._remaining(response) == 0 or 'Retry-After' in response.headers)
+        if response.status_code not in RETRY_STATUSES and not exhausted:
+            return None
+
+        self.stats['retries'] += 1
+        retry_after = self._retry_after(response)
+        if retry_after is None and exhausted:
+            retry_after = self._reset_in(response) or 0
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_wait else None
+        return self._backoff_delay(attempt)
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def _remaining(self, response):
+        value = response.headers.get('X-RateLimit-Remaining', response.headers.get('RateLimit-Remaining'))
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _reset_in(self, response):
+        """Seconds until the rate-limit window resets"""
+        if 'X-RateLimit-Reset' in response.headers:
+            # Epoch seconds (GitHub and most providers)
+            try:
+                return max(float(response.headers['X-RateLimit-Reset']) - time.time(), 0)
+            except ValueError:
+                return None
+        try:
+            # Delta seconds (IETF RateLimit header fields)
+            return float(response.headers['RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return None
+
+    def _update_limits(self, response):
+        remaining = self._remaining(response)
+        reset_in = self._reset_in(response)
+        if remaining is None or reset_in is None:
+            return
+
+        resource = response.headers.get('X-RateLimit-Resource', 'default')
+        limit = response.headers.get('X-RateLimit-Limit', response.headers.get('RateLimit-Limit'))
+        previous = self.budgets.get(resource, {})
+        self.budgets[resource] = {
+            # 304s may omit the limit
+            'limit': int(limit) if limit and limit.isdigit() else previous.get('limit'),
+            'remaining': remaining,
+            'reset_at': time.time() + reset_in
+        }
+        if self.primary_resource and resource not in (self.primary_resource, 'default'):
+            return
+
+        if remaining == 0:
+            # Shared by every client of the provider
+            self.limiter.pause(reset_in)
+        elif reset_in > 0:
+            # Spread what is left of the window instead of bursting into a ban
+            self.limiter.set_rate(min(self.default_rate, remaining / reset_in))
+        else:
+            self.limiter.set_rate(self.default_rate)
+
+    def budget(self):
+        """Quota left per rate-limit resource plus request counters"""
+        now = time.time()
+        budgets = {
+            resource: dict(quota, reset_in=round(max(quota['reset_at'] - now, 0), 1))
+            for resource, quota in self.budgets.items()
+        }
+        return {
+            'budgets': budgets,
+            'rate': round(self.limiter.rate, 4),
+            'paused_for': round(self.limiter.paused_for(), 1),
+            'stats': dict(self.stats, waited=round(self.stats['waited'], 2))
+        }
+
+    def close(self):
+        self.session.close()
@@ -1,17 +1,18 @@
-import requests
 import json
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from integrations.http_client import HTTPClient
 
 class OTXClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None):
         self.api_key = api_key
         self.base_url = "https://otx.alienvault.com/api/v1"
         self.headers = {
             "X-OTX-API-KEY": api_key,
             "Accept": "application/json"
         } if api_key else {}
+        self.http = HTTPClient('otx', cache=cache)
         self.results = {
             'pulses': [],
             'indicators': [],
@@ -25,7 +26,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/pulses/{pulse_id}",
                 headers=self.headers
             )
@@ -44,7 +45,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/indicators/{indicator_type}/{indicator}/general",
                 headers=self.headers
             )
@@ -68,7 +69,7 @@ class OTXClient:
                 'limit': limit
             }
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/search/pulses",
                 headers=self.headers,
                 params=params
@@ -88,7 +89,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/indicators/domain/{domain}",
                 headers=self.headers
             )
@@ -107,7 +108,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/indicators/IPv4/{ip}",
                 headers=self.headers
             )
@@ -126,7 +127,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/indicators/file/{hash_value}/analysis",
                 headers=self.headers
             )
@@ -145,7 +146,7 @@ class OTXClient:
             if not self.api_key:
                 raise ValueError("OTX API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/users/{username}/pulses",
                 headers=self.headers
             )
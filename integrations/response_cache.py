@@ -0,0 +1,179 @@
+import fnmatch
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# 'provider:endpoint' glob -> TTL in seconds; the first match wins
+DEFAULT_TTLS = [
+    ('wayback:/web/*', 365 * DAY),  # a snapshot at a fixed timestamp never changes
+    ('wayback:*', DAY),
+    ('securitytrails:*/history/*', 7 * DAY),
+    ('securitytrails:*/whois', 7 * DAY),
+    ('securitytrails:*', DAY),
+    ('otx:*', 6 * HOUR),
+    ('shodan:*', DAY),
+    ('censys:*', DAY),
+    ('github:*', HOUR)
+]
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a response was never cached"""
+
+
+class ResponseCache:
+    """Persistent, compressed cache of third-party API responses.
+
+    Entries are keyed on (provider, endpoint, params) and expire after a
+    per-endpoint TTL (ttls, falling back to DEFAULT_TTLS and default_ttl).
+    Bodies are zlib-compressed and the least recently used entries are
+    evicted once the payload total exceeds max_bytes. In offline mode
+    expired entries are still served and misses raise CacheMiss, so a
+    previous investigation can be replayed without network access.
+    """
+
+    def __init__(self, path='api_cache.sqlite', ttls=None, default_ttl=DAY,
+                 max_bytes=512 * 1024 * 1024, offline=False):
+        self.path = path
+        self.ttls = list(ttls or []) + DEFAULT_TTLS
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                endpoint TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.conn.commit()
+        self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def key(self, provider, endpoint, params=None):
+        data = json.dumps([provider, endpoint, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def ttl(self, provider, endpoint):
+        name = f"{provider}:{endpoint}"
+        for pattern, ttl in self.ttls:
+            if fnmatch.fnmatchcase(name, pattern):
+                return ttl
+        return self.default_ttl
+
+    def get(self, provider, endpoint, params=None, allow_stale=False):
+        """Return {'status', 'headers', 'body', 'created_at', 'stale'} or None.
+
+        Expired entries count as missing unless allow_stale is set (for
+        conditional revalidation) or the cache is offline.
+        """
+        key = self.key(provider, endpoint, params)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            stale = row is not None and not self.offline and time.time() - row[3] > self.ttl(provider, endpoint)
+            if row is None or (stale and not allow_stale):
+                self.stats['misses'] += 1
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.stats['hits'] += 1
+        status, headers, body, created_at = row
+        return {
+            'status': status,
+            'headers': json.loads(headers) if headers else {},
+            'body': zlib.decompress(body),
+            'created_at': created_at,
+            'stale': stale
+        }
+
+    def touch(self, provider, endpoint, params=None):
+        """Restart an entry's TTL after the server confirmed it is unchanged"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("UPDATE responses SET created_at = ?, accessed_at = ? WHERE key = ?",
+                              (now, now, self.key(provider, endpoint, params)))
+            self.conn.commit()
+
+    def put(self, provider, endpoint, params, body, status=200, headers=None):
+        """Store a response body (bytes) with its status and headers"""
+        key = self.key(provider, endpoint, params)
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, endpoint, status, json.dumps(dict(headers or {})),
+                 compressed, len(compressed), now, now)
+            )
+            self._size += len(compressed) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def get_json(self, provider, endpoint, params=None):
+        cached = self.get(provider, endpoint, params)
+        return json.loads(cached['body']) if cached else None
+
+    def put_json(self, provider, endpoint, params, value):
+        self.put(provider, endpoint, params, json.dumps(value, default=str).encode('utf-8'))
+
+    def _evict(self):
+        # Drop least recently used entries down to 90% of the cap
+        target = self.max_bytes * 0.9
+        cursor = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+        doomed = []
+        for key, size in cursor:
+            if self._size <= target:
+                break
+            doomed.append((key,))
+            self._size -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.stats['evictions'] += len(doomed)
+
+    def purge_expired(self):
+        """Delete entries past their TTL; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                (key,) for key, provider, endpoint, created_at in self.conn.execute(
+                    "SELECT key, provider, endpoint, created_at FROM responses").fetchall()
+                if now - created_at > self.ttl(provider, endpoint)
+            ]
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", expired)
+            self.conn.commit()
+            self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return len(expired)
+
+    def close(self):
+        self.conn.close()
+
+
+def cached_call(cache, provider, endpoint, params, fetch):
+    """Return fetch()'s JSON-serialisable result through the cache, if any"""
+    if cache is None:
+        return fetch()
+    value = cache.get_json(provider, endpoint, params)
+    if value is not None:
+        return value
+    if cache.offline:
+        raise CacheMiss(f"No cached {provider} response for {endpoint} {params or ''}".strip())
+    value = fetch()
+    cache.put_json(provider, endpoint, params, value)
+    return value
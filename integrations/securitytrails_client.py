@@ -1,17 +1,18 @@
-import requests
 import json
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from integrations.http_client import HTTPClient
 
 class SecurityTrailsClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None):
         self.api_key = api_key
         self.base_url = "https://api.securitytrails.com/v1"
         self.headers = {
             "Accept": "application/json",
             "APIKEY": api_key
         } if api_key else {}
+        self.http = HTTPClient('securitytrails', cache=cache)
         self.results = {
             'domain_info': [],
             'dns_records': [],
@@ -25,7 +26,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domain/{domain}",
                 headers=self.headers
             )
@@ -44,7 +45,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/history/{domain}/dns/{record_type}",
                 headers=self.headers
             )
@@ -63,7 +64,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domain/{domain}/dns/{record_type}",
                 headers=self.headers
             )
@@ -82,7 +83,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domain/{domain}/whois",
                 headers=self.headers
             )
@@ -101,7 +102,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domain/{domain}/subdomains",
                 headers=self.headers
             )
@@ -119,7 +120,7 @@ class SecurityTrailsClient:
             if not self.api_key:
                 raise ValueError("SecurityTrails API key not configured")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domain/{domain}/associated",
                 headers=self.headers
             )
@@ -142,7 +143,7 @@ class SecurityTrailsClient:
                 'filter': filter_type
             }
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/domains/list",
                 headers=self.headers,
                 params=params
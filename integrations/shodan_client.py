@@ -3,11 +3,14 @@ import json
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from integrations.response_cache import cached_call
 
 class ShodanClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None):
         self.api_key = api_key
         self.api = shodan.Shodan(api_key) if api_key else None
+        # Optional ResponseCache for host lookups
+        self.cache = cache
         self.results = {
             'hosts': [],
             'search_results': [],
@@ -17,10 +20,7 @@ class ShodanClient:
     def host_info(self, ip):
         """Get information about a specific host"""
         try:
-            if not self.api_key:
-                raise ValueError("Shodan API key not configured")
-            
-            host = self.api.host(ip)
+            host = self._host(ip)
             self.results['hosts'].append(host)
             return host
         except shodan.APIError as e:
@@ -30,6 +30,14 @@ class ShodanClient:
             self.results['errors'].append(f"Host lookup error: {str(e)}")
             return None
 
+    def _host(self, ip):
+        def lookup():
+            if not self.api_key:
+                raise ValueError("Shodan API key not configured")
+            return self.api.host(ip)
+
+        return cached_call(self.cache, 'shodan', 'host', {'ip': ip}, lookup)
+
     def search(self, query, limit=100):
         """Search Shodan for devices matching query"""
         try:
@@ -110,7 +118,7 @@ class ShodanClient:
             ip = socket.gethostbyname(domain)
             
             # Then get host info
-            host = self.api.host(ip)
+            host = self._host(ip)
             host['domain'] = domain
             self.results['hosts'].append(host)
             return host
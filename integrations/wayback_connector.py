@@ -1,47 +1,95 @@
-import requests
 import json
 import os
+from collections import namedtuple
 from datetime import datetime
 from urllib.parse import urlparse
+from core.sinks import collect
+from integrations.http_client import HTTPClient
+
+# One capture, in the field order requested from the CDX API
+CDXRow = namedtuple('CDXRow', ['url', 'timestamp', 'status', 'digest', 'length'])
+CDX_FIELDS = 'original,timestamp,statuscode,digest,length'
+
 
 class WaybackConnector:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.base_url = "https://web.archive.org"
         self.cdx_url = "https://web.archive.org/cdx/search/cdx"
+        self.http = HTTPClient('wayback', cache=cache)
         self.results = {
             'snapshots': [],
             'pages': [],
             'errors': []
         }
 
-    def get_snapshots(self, url, limit=100):
+    def iter_cdx(self, url, match_type=None, from_ts=None, to_ts=None, status=None, mimetype=None,
+                 filters=None, collapse=None, limit=None, page_size=5000):
+        """Stream CDX captures as CDXRow tuples in constant memory.
+
+        Plain-text output is read line by line and paged with resume keys,
+        so there is no cap on the number of captures. status, mimetype,
+        filters (raw 'field:regex' strings) and collapse are applied by
+        the server; limit stops after that many rows.
+        """
+        params = {
+            'url': url,
+            'fl': CDX_FIELDS,
+            'showResumeKey': 'true'
+        }
+        if match_type:
+            params['matchType'] = match_type
+        if from_ts:
+            params['from'] = from_ts
+        if to_ts:
+            params['to'] = to_ts
+        server_filters = list(filters or [])
+        if status:
+            server_filters.append(f"statuscode:{status}")
+        if mimetype:
+            server_filters.append(f"mimetype:{mimetype}")
+        if server_filters:
+            params['filter'] = server_filters
+        if collapse:
+            params['collapse'] = collapse
+
+        count = 0
+        resume_key = None
+        while True:
+            params['limit'] = min(page_size, limit - count) if limit else page_size
+            if resume_key:
+                params['resumeKey'] = resume_key
+            resume_key = None
+            # Pages are only streamed when uncached; a cached client stores each
+            # page (at most page_size lines) so offline replay covers CDX queries
+            with self.http.get(self.cdx_url, params=params, stream=self.http.cache is None) as response:
+                response.raise_for_status()
+                response.encoding = response.encoding or 'utf-8'
+                blank = False
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        # The resume key follows a blank line after the last row
+                        blank = True
+                        continue
+                    if blank:
+                        resume_key = line.strip()
+                        break
+                    # Only the original URL (the first field) may contain spaces
+                    parts = line.rsplit(' ', len(CDXRow._fields) - 1)
+                    if len(parts) != len(CDXRow._fields):
+                        self.results['errors'].append(f"Malformed CDX line skipped: {line[:200]}")
+                        continue
+                    yield CDXRow(*parts)
+                    count += 1
+                    if limit and count >= limit:
+                        return
+            if not resume_key:
+                return
+
+    def get_snapshots(self, url, limit=100, sink=None):
         """Get historical snapshots for a URL"""
-        try:
-            params = {
-                'url': url,
-                'output': 'json',
-                'limit': limit,
-                'collapse': 'timestamp:6'  # Group by hour
-            }
-            
-            response = requests.get(self.cdx_url, params=params)
-            response.raise_for_status()
-            
-            snapshots = response.json()
-            if len(snapshots) > 1:  # First row is headers
-                for snapshot in snapshots[1:]:
-                    self.results['snapshots'].append({
-                        'url': snapshot[0],
-                        'timestamp': snapshot[1],
-                        'status': snapshot[2],
-                        'digest': snapshot[3],
-                        'length': snapshot[4]
-                    })
-                return self.results['snapshots']
-            return []
-        except Exception as e:
-            self.results['errors'].append(f"Snapshot fetch error: {str(e)}")
-            return []
+        rows = self.iter_cdx(url, limit=limit, collapse='timestamp:6')  # Group by month
+        return collect(self.results, 'snapshots', (row._asdict() for row in rows), sink,
+                       'Snapshot fetch error')
 
     def get_page(self, url, timestamp=None):
         """Get archived page content"""
@@ -54,7 +102,7 @@ class WaybackConnector:
                 timestamp = snapshots[0]['timestamp']
             
             wayback_url = f"{self.base_url}/web/{timestamp}id_/{url}"
-            response = requests.get(wayback_url)
+            response = self.http.get(wayback_url)
             response.raise_for_status()
             
             page_data = {
@@ -70,34 +118,12 @@ class WaybackConnector:
             self.results['errors'].append(f"Page fetch error: {str(e)}")
             return None
 
-    def search_domain(self, domain, limit=100):
-        """Search for all pages under a domain"""
-        try:
-            params = {
-                'url': f"*.{domain}/*",
-                'output': 'json',
-                'limit': limit,
-                'collapse': 'urlkey'  # Group by URL
-            }
-            
-            response = requests.get(self.cdx_url, params=params)
-            response.raise_for_status()
-            
-            pages = response.json()
-            if len(pages) > 1:  # First row is headers
-                for page in pages[1:]:
-                    self.results['pages'].append({
-                        'url': page[0],
-                        'timestamp': page[1],
-                        'status': page[2],
-                        'digest': page[3],
-                        'length': page[4]
-                    })
-                return self.results['pages']
-            return []
-        except Exception as e:
-            self.results['errors'].append(f"Domain search error: {str(e)}")
-            return []
+    def search_domain(self, domain, limit=100, status=None, mimetype=None, sink=None):
+        """Search for all pages under a domain (limit=None for every page)"""
+        rows = self.iter_cdx(domain, match_type='domain', limit=limit, status=status,
+                             mimetype=mimetype, collapse='urlkey')  # Group by URL
+        return collect(self.results, 'pages', (row._asdict() for row in rows), sink,
+                       'Domain search error')
 
     def find_changes(self, url, timestamp1, timestamp2):
         """Compare two versions of a page"""
@@ -122,35 +148,15 @@ class WaybackConnector:
             self.results['errors'].append(f"Change detection error: {str(e)}")
             return None
 
-    def find_historical_records(self, domain, year=None):
+    def find_historical_records(self, domain, year=None, limit=None, status=None, sink=None):
         """Find historical records for a domain"""
-        try:
-            params = {
-                'url': domain,
-                'output': 'json'
-            }
-            if year:
-                params['from'] = f"{year}0101"
-                params['to'] = f"{year}1231"
-                
-            response = requests.get(self.cdx_url, params=params)
-            response.raise_for_status()
-            
-            records = response.json()
-            if len(records) > 1:  # First row is headers
-                for record in records[1:]:
-                    self.results['snapshots'].append({
-                        'url': record[0],
-                        'timestamp': record[1],
-                        'status': record[2],
-                        'digest': record[3],
-                        'length': record[4]
-                    })
-                return self.results['snapshots']
-            return []
-        except Exception as e:
-            self.results['errors'].append(f"Historical records error: {str(e)}")
-            return []
+        from_ts = to_ts = None
+        if year:
+            from_ts = f"{year}0101"
+            to_ts = f"{year}1231"
+        rows = self.iter_cdx(domain, from_ts=from_ts, to_ts=to_ts, status=status, limit=limit)
+        return collect(self.results, 'snapshots', (row._asdict() for row in rows), sink,
+                       'Historical records error')
 
     def to_json(self):
         """Return results as JSON"""